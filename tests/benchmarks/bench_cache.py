@@ -0,0 +1,84 @@
+"""Бенчмарк бэкендов кеша: LocMemCache, FileBasedCache и SQLiteCache.
+
+Запуск: pytest tests/benchmarks/bench_cache.py
+
+BENCH_OPERATIONS - число операций каждого вида (по умолчанию 2000);
+BENCH_OUTPUT - файл с результатами (по умолчанию bench_cache.json).
+Замеряются get (попадание и промах), set фрагмента страницы, incr
+версии ленты и get_many на 10 ключей.
+"""
+import json
+import os
+import platform
+import statistics
+import tempfile
+import time
+
+import pytest
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+
+from core.cache import SQLiteCache
+
+OPERATIONS = int(os.getenv('BENCH_OPERATIONS', '2000'))
+OUTPUT = os.getenv('BENCH_OUTPUT', 'bench_cache.json')
+FRAGMENT = '<div class="card">Тестовый пост</div>' * 100
+
+results = []
+
+
+@pytest.fixture(scope='module', autouse=True)
+def write_results():
+    yield
+    with open(OUTPUT, 'w', encoding='utf-8') as output:
+        json.dump({
+            'python': platform.python_version(),
+            'operations': OPERATIONS,
+            'results': results,
+        }, output, ensure_ascii=False, indent=2)
+
+
+@pytest.fixture(params=['locmem', 'filebased', 'sqlite'])
+def backend(request, tmp_path):
+    # Лимит с запасом: иначе LocMem и FileBased вытеснят версию ленты.
+    params = {'OPTIONS': {'MAX_ENTRIES': OPERATIONS * 2}}
+    if request.param == 'locmem':
+        return request.param, LocMemCache('bench', params)
+    if request.param == 'filebased':
+        return request.param, FileBasedCache(str(tmp_path / 'files'), params)
+    return request.param, SQLiteCache(
+        os.path.join(tempfile.mkdtemp(dir=tmp_path), 'cache.sqlite3'), params
+    )
+
+
+def timed(operation, count):
+    timings = []
+    for number in range(count):
+        start = time.perf_counter()
+        operation(number)
+        timings.append((time.perf_counter() - start) * 1_000_000)
+    timings.sort()
+    return {
+        'p50_us': round(statistics.median(timings), 2),
+        'p95_us': round(timings[int(len(timings) * 0.95)], 2),
+    }
+
+
+def test_benchmark_cache(backend):
+    name, cache = backend
+    keys = [f'fragment:{number}' for number in range(OPERATIONS)]
+    cache.set('feed-version:index', 1, timeout=None)
+    operations = {
+        'set': lambda n: cache.set(keys[n], FRAGMENT),
+        'get_hit': lambda n: cache.get(keys[n]),
+        'get_miss': lambda n: cache.get(f'missing:{n}'),
+        'incr': lambda n: cache.incr('feed-version:index'),
+        'get_many_10': lambda n: cache.get_many(keys[n:n + 10]),
+    }
+    for operation, function in operations.items():
+        results.append({
+            'backend': name,
+            'operation': operation,
+            **timed(function, OPERATIONS),
+        })
+    assert cache.get('feed-version:index') == OPERATIONS + 1
@@ -0,0 +1,92 @@
+"""Бенчмарк posts.concurrent: profile и post_detail с пулом и без него.
+
+Запуск: pytest tests/benchmarks/bench_concurrent.py
+
+BENCH_SIZE   - число постов автора (по умолчанию 1000);
+BENCH_REPEAT - число запросов на замер (по умолчанию 50);
+BENCH_OUTPUT - файл с результатами (по умолчанию bench_concurrent.json).
+
+Кеш чистится перед каждым запросом: иначе счётчики автора берутся из
+кеша и параллельно выполнять нечего. Тест идёт вне транзакции, иначе
+gather выполняет задачи по очереди.
+"""
+import json
+import os
+import platform
+import statistics
+import time
+from unittest import mock
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Post
+
+SIZE = int(os.getenv('BENCH_SIZE', '1000'))
+REPEAT = int(os.getenv('BENCH_REPEAT', '50'))
+OUTPUT = os.getenv('BENCH_OUTPUT', 'bench_concurrent.json')
+WORKERS = {'sequential': 0, 'pool': 4}
+
+results = []
+
+pytestmark = [pytest.mark.django_db(transaction=True)]
+
+
+@pytest.fixture(scope='module', autouse=True)
+def write_results():
+    yield
+    with open(OUTPUT, 'w', encoding='utf-8') as output:
+        json.dump({
+            'python': platform.python_version(),
+            'database': connection.vendor,
+            'size': SIZE,
+            'repeat': REPEAT,
+            'results': results,
+        }, output, ensure_ascii=False, indent=2)
+
+
+@pytest.fixture
+def post(user, another_user):
+    Post.objects.bulk_create(
+        Post(author=another_user, text=f'Пост бенчмарка {number}')
+        for number in range(SIZE)
+    )
+    post = Post.objects.filter(author=another_user).first()
+    Comment.objects.bulk_create(
+        Comment(author=user, post=post, text=f'Комментарий {number}')
+        for number in range(SIZE)
+    )
+    Follow.objects.create(user=user, author=another_user)
+    return post
+
+
+def test_benchmark_concurrent(post, user_client):
+    urls = {
+        'posts:profile': reverse(
+            'posts:profile', kwargs={'username': post.author.username}
+        ),
+        'posts:post_detail': reverse(
+            'posts:post_detail', kwargs={'post_id': post.pk}
+        ),
+    }
+    for (view, url), (mode, workers) in (
+        (item, mode) for item in urls.items() for mode in WORKERS.items()
+    ):
+        with mock.patch('posts.concurrent.VIEW_QUERY_WORKERS', workers):
+            user_client.get(url)
+            timings = []
+            for _ in range(REPEAT):
+                cache.clear()
+                start = time.perf_counter()
+                response = user_client.get(url)
+                timings.append((time.perf_counter() - start) * 1000)
+                assert response.status_code == 200
+        timings.sort()
+        results.append({
+            'view': view,
+            'mode': mode,
+            'p50_ms': round(statistics.median(timings), 3),
+            'p95_ms': round(timings[int(len(timings) * 0.95)], 3),
+        })
@@ -0,0 +1,128 @@
+"""Бенчмарк рендеринга страницы ленты: загрузчики шаблонов и карточки.
+
+Запуск: pytest tests/benchmarks/bench_templates.py
+
+BENCH_REPEAT - число рендеров на замер (по умолчанию 200);
+BENCH_OUTPUT - файл с результатами (по умолчанию bench_templates.json).
+
+Страница из PAGINATOR_LIMIT карточек рендерится во всех сочетаниях:
+    loader    - uncached (шаблоны разбираются на каждом рендере) или cached;
+    cards     - include ({% include %} и {% cache %} на каждую карточку,
+                как было раньше) или post_cards (один тег на страницу);
+    fragments - cold (кеш чистится перед рендером) или warm.
+"""
+import itertools
+import json
+import os
+import platform
+import statistics
+import time
+
+import pytest
+from django.conf import settings
+from django.core.cache import cache
+from django.template.backends.django import DjangoTemplates
+from django.test import RequestFactory
+
+from posts.models import Group, Post
+from posts.settings import PAGINATOR_LIMIT, POST_CARD_CACHE_TIMEOUT
+
+REPEAT = int(os.getenv('BENCH_REPEAT', '200'))
+OUTPUT = os.getenv('BENCH_OUTPUT', 'bench_templates.json')
+LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+CARDS = {
+    'include': (
+        "{% load cache %}{% for post in page_obj %}"
+        '<div class="card mb-4" style="width: {{post_width}};">'
+        '<div class="card-body">'
+        '{% cache card_cache_timeout post_card post.pk '
+        'post.modified.isoformat post.author.username '
+        'post.author.get_full_name post.group.slug post.group.title '
+        'no_display_group %}'
+        "{% include 'posts/includes/post_body.html' %}{% endcache %}"
+        "<p>{% include 'posts/includes/like_comment.html' %}</p>"
+        '</div></div>{% if not forloop.last %}<p>{% endif %}{% endfor %}'
+    ),
+    'post_cards': '{% load post_cards %}{% post_cards page_obj %}',
+}
+
+results = []
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture(scope='module', autouse=True)
+def write_results():
+    yield
+    with open(OUTPUT, 'w', encoding='utf-8') as output:
+        json.dump({
+            'python': platform.python_version(),
+            'repeat': REPEAT,
+            'cards': PAGINATOR_LIMIT,
+            'results': results,
+        }, output, ensure_ascii=False, indent=2)
+
+
+def backend(cached):
+    options = settings.TEMPLATES[0]['OPTIONS']
+    return DjangoTemplates({
+        'NAME': 'bench',
+        'DIRS': settings.TEMPLATES[0]['DIRS'],
+        'APP_DIRS': False,
+        'OPTIONS': {
+            'context_processors': options['context_processors'],
+            'loaders': (
+                [('django.template.loaders.cached.Loader', LOADERS)]
+                if cached else LOADERS
+            ),
+        },
+    })
+
+
+@pytest.fixture
+def page(user):
+    group = Group.objects.create(
+        title='Группа бенчмарка', slug='bench', description='Описание'
+    )
+    Post.objects.bulk_create(
+        Post(author=user, group=group, text=f'Пост бенчмарка {number}')
+        for number in range(PAGINATOR_LIMIT)
+    )
+    return list(Post.objects.for_feed()[:PAGINATOR_LIMIT])
+
+
+def test_benchmark_templates(page, user):
+    request = RequestFactory().get('/')
+    request.user = user
+    context = {
+        'page_obj': page,
+        'post_width': '68rem',
+        'card_cache_timeout': POST_CARD_CACHE_TIMEOUT,
+    }
+    for (loader, cached), (cards, source), warm in itertools.product(
+        [('uncached', False), ('cached', True)],
+        CARDS.items(),
+        [False, True],
+    ):
+        template = backend(cached).from_string(source)
+        cache.clear()
+        template.render(context, request)
+        timings = []
+        for _ in range(REPEAT):
+            if not warm:
+                cache.clear()
+            start = time.perf_counter()
+            html = template.render(context, request)
+            timings.append((time.perf_counter() - start) * 1000)
+        assert html.count('class="card mb-4"') == PAGINATOR_LIMIT
+        timings.sort()
+        results.append({
+            'loader': loader,
+            'cards': cards,
+            'fragments': 'warm' if warm else 'cold',
+            'p50_ms': round(statistics.median(timings), 3),
+            'p95_ms': round(timings[int(len(timings) * 0.95)], 3),
+        })
@@ -0,0 +1,188 @@
+"""Бенчмарк представлений posts на синтетических данных.
+
+Не входит в обычный прогон тестов, запускается явно:
+
+    pytest tests/benchmarks/bench_views.py
+
+Параметры задаются переменными окружения:
+    BENCH_SIZES  - число постов через запятую (по умолчанию 100,1000);
+    BENCH_REPEAT - число запросов на замер задержки (по умолчанию 20);
+    BENCH_CACHE  - cold (кеш чистится перед каждым запросом) или warm;
+    BENCH_OUTPUT - файл с результатами (по умолчанию bench_output.json).
+
+Результат - JSON с p50/p95 задержки, числом SQL-запросов и пиковой
+памятью на каждое представление и размер данных; файлы разных коммитов
+можно сравнивать между собой. Лимиты запросов на время замеров
+отключены: иначе add_comment после двадцатого запроса мерил бы ответы 429.
+"""
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+import tracemalloc
+from unittest import mock
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from faker import Faker
+
+from posts.models import Comment, Follow, Group, Post
+
+SIZES = [
+    int(size) for size in os.getenv('BENCH_SIZES', '100,1000').split(',')
+]
+REPEAT = int(os.getenv('BENCH_REPEAT', '20'))
+CACHE_MODE = os.getenv('BENCH_CACHE', 'cold')
+OUTPUT = os.getenv('BENCH_OUTPUT', 'bench_output.json')
+AUTHORS = 20
+GROUPS = 5
+COMMENTS_PER_POST = 3
+LIKES_PER_POST = 5
+
+results = []
+
+pytestmark = [pytest.mark.django_db]
+
+
+def percentile(values, percent):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+@pytest.fixture(scope='module', autouse=True)
+def write_results():
+    yield
+    with open(OUTPUT, 'w', encoding='utf-8') as output:
+        json.dump({
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'database': connection.vendor,
+            'cache': CACHE_MODE,
+            'repeat': REPEAT,
+            'results': results,
+        }, output, ensure_ascii=False, indent=2)
+
+
+@pytest.fixture(autouse=True)
+def no_rate_limits():
+    with mock.patch.dict('posts.ratelimit.RATE_LIMITS', clear=True):
+        yield
+
+
+@pytest.fixture
+def dataset(request, mixer, user):
+    """Авторы, группы, посты, комментарии, лайки и подписки."""
+    size = request.param
+    fake = Faker('ru_RU')
+    authors = mixer.cycle(AUTHORS).blend('auth.User')
+    groups = mixer.cycle(GROUPS).blend(Group)
+    Post.objects.bulk_create(
+        Post(
+            author=authors[i % AUTHORS],
+            group=groups[i % GROUPS],
+            text=fake.text(),
+        )
+        for i in range(size)
+    )
+    posts = list(Post.objects.order_by('pk')[:size])
+    Comment.objects.bulk_create(
+        Comment(author=authors[j], post=post, text=fake.sentence())
+        for post in posts
+        for j in range(COMMENTS_PER_POST)
+    )
+    Post.likes.through.objects.bulk_create(
+        Post.likes.through(post=post, user=authors[j])
+        for post in posts
+        for j in range(LIKES_PER_POST)
+    )
+    Post.objects.recount()
+    # Подписки после постов: сигнал заполняет ленту подписок.
+    for author in authors[:AUTHORS // 2]:
+        Follow.objects.create(user=user, author=author)
+    return {
+        'size': size,
+        'author': authors[0],
+        'group': groups[0],
+        'post': posts[0],
+    }
+
+
+def measure(client, name, size, method, url, data=None, **extra):
+    def send():
+        response = getattr(client, method)(url, data, **extra)
+        assert response.status_code in (200, 302), response.status_code
+
+    timings = []
+    for _ in range(REPEAT):
+        if CACHE_MODE == 'cold':
+            cache.clear()
+        start = time.perf_counter()
+        send()
+        timings.append((time.perf_counter() - start) * 1000)
+    if CACHE_MODE == 'cold':
+        cache.clear()
+    with CaptureQueriesContext(connection) as queries:
+        send()
+    # Считаем сразу: следующий запрос очистит журнал (reset_queries).
+    query_count = len(queries)
+    if CACHE_MODE == 'cold':
+        cache.clear()
+    tracemalloc.start()
+    send()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    results.append({
+        'view': name,
+        'size': size,
+        'p50_ms': round(statistics.median(timings), 3),
+        'p95_ms': round(percentile(timings, 95), 3),
+        'queries': query_count,
+        'peak_memory_kb': round(peak / 1024, 1),
+    })
+
+
+@pytest.mark.parametrize('dataset', SIZES, indirect=True)
+def test_benchmark_views(dataset, user_client):
+    size = dataset['size']
+    post_id = dataset['post'].pk
+    reads = {
+        'posts:index': reverse('posts:index'),
+        'posts:group_list': reverse(
+            'posts:group_list', kwargs={'slug': dataset['group'].slug}
+        ),
+        'posts:profile': reverse(
+            'posts:profile',
+            kwargs={'username': dataset['author'].username}
+        ),
+        'posts:post_detail': reverse(
+            'posts:post_detail', kwargs={'post_id': post_id}
+        ),
+        'posts:follow_index': reverse('posts:follow_index'),
+    }
+    for name, url in reads.items():
+        measure(user_client, name, size, 'get', url)
+    measure(
+        user_client, 'posts:like', size, 'post',
+        reverse('posts:like', kwargs={'post_id': post_id}),
+        HTTP_X_REQUESTED_WITH='XMLHttpRequest',
+    )
+    measure(
+        user_client, 'posts:add_comment', size, 'post',
+        reverse('posts:add_comment', kwargs={'post_id': post_id}),
+        {'text': 'Комментарий бенчмарка'},
+    )
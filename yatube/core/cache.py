@@ -0,0 +1,260 @@
+"""Кеш в файле SQLite, общий для всех процессов сервера.
+
+LocMemCache у каждого воркера свой: сброс версии ленты в одном воркере
+не виден остальным. Этот бэкенд хранит записи в одной базе SQLite в
+режиме WAL: читатели не блокируют писателя, а внешний сервер не нужен.
+
+Целые числа хранятся как INTEGER, поэтому incr - один атомарный UPDATE.
+Размер ограничен OPTIONS['MAX_SIZE'] (байт значений): при превышении
+вытесняются давно не читанные записи.
+"""
+import contextlib
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+SCHEMA = (
+    '''CREATE TABLE IF NOT EXISTS cache (
+        key TEXT PRIMARY KEY,
+        value,
+        expires REAL,
+        accessed REAL NOT NULL,
+        size INTEGER NOT NULL
+    ) WITHOUT ROWID''',
+    'CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)',
+    '''CREATE TABLE IF NOT EXISTS cache_size (
+        id INTEGER PRIMARY KEY CHECK (id = 0),
+        total INTEGER NOT NULL
+    )''',
+    'INSERT OR IGNORE INTO cache_size VALUES (0, 0)',
+    '''CREATE TRIGGER IF NOT EXISTS cache_size_insert AFTER INSERT ON cache
+    BEGIN
+        UPDATE cache_size SET total = total + new.size;
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS cache_size_delete AFTER DELETE ON cache
+    BEGIN
+        UPDATE cache_size SET total = total - old.size;
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS cache_size_update
+    AFTER UPDATE OF size ON cache
+    BEGIN
+        UPDATE cache_size SET total = total - old.size + new.size;
+    END''',
+)
+DEFAULT_MAX_SIZE = 64 * 1024 * 1024
+# Время чтения обновляется не чаще раза в столько секунд: LRU приближённый,
+# зато обычный get не превращается в запись.
+ACCESS_RESOLUTION = 1.0
+# Вытесняем с запасом, чтобы не чистить кеш на каждой записи.
+CULL_TARGET = 0.9
+
+
+def dump(value):
+    if type(value) is int:
+        return value, 8
+    data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+    return data, len(data)
+
+
+def load(value):
+    if type(value) is int:
+        return value
+    return pickle.loads(value)
+
+
+class SQLiteCache(BaseCache):
+    def __init__(self, location, params):
+        super().__init__(params)
+        self.location = location
+        options = params.get('OPTIONS', {})
+        self.max_size = int(options.get('MAX_SIZE', DEFAULT_MAX_SIZE))
+        self.local = threading.local()
+
+    @property
+    def db(self):
+        """Своё соединение на поток; после fork открывается заново."""
+        local = self.local
+        if getattr(local, 'pid', None) != os.getpid():
+            local.db = self.connect()
+            local.pid = os.getpid()
+        return local.db
+
+    def connect(self):
+        directory = os.path.dirname(self.location)
+        if directory:
+            os.makedirs(directory, mode=0o700, exist_ok=True)
+        db = sqlite3.connect(
+            self.location, timeout=30, isolation_level=None,
+            check_same_thread=False,
+        )
+        db.execute('PRAGMA journal_mode=WAL')
+        db.execute('PRAGMA synchronous=NORMAL')
+        db.execute('BEGIN IMMEDIATE')
+        for sql in SCHEMA:
+            db.execute(sql)
+        db.execute('COMMIT')
+        return db
+
+    @contextlib.contextmanager
+    def write(self):
+        """Транзакция записи: BEGIN IMMEDIATE сразу берёт блокировку."""
+        db = self.db
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            yield db
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+        db.execute('COMMIT')
+
+    def key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def get(self, key, default=None, version=None):
+        return self.get_many([key], version=version).get(key, default)
+
+    def get_many(self, keys, version=None):
+        names = {self.key(key, version): key for key in keys}
+        if not names:
+            return {}
+        now = time.time()
+        rows = self.db.execute(
+            'SELECT key, value, expires, accessed FROM cache '
+            'WHERE key IN ({})'.format(', '.join('?' * len(names))),
+            list(names),
+        ).fetchall()
+        found, expired, stale = {}, [], []
+        for name, value, expires, accessed in rows:
+            if expires is not None and expires <= now:
+                expired.append(name)
+                continue
+            found[names[name]] = load(value)
+            if now - accessed > ACCESS_RESOLUTION:
+                stale.append((now, name))
+        if expired or stale:
+            with self.write() as db:
+                db.executemany(
+                    'DELETE FROM cache WHERE key = ? AND expires <= ?',
+                    [(name, now) for name in expired],
+                )
+                db.executemany(
+                    'UPDATE cache SET accessed = ? WHERE key = ?', stale
+                )
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.set_many({key: value}, timeout, version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        now, expires = time.time(), self.get_backend_timeout(timeout)
+        rows = [
+            (self.key(key, version), *dump(value), expires, now)
+            for key, value in data.items()
+        ]
+        with self.write() as db:
+            db.executemany(
+                'INSERT INTO cache (key, value, size, expires, accessed) '
+                'VALUES (?, ?, ?, ?, ?) ON CONFLICT (key) DO UPDATE SET '
+                'value = excluded.value, size = excluded.size, '
+                'expires = excluded.expires, accessed = excluded.accessed',
+                rows,
+            )
+            self.cull()
+        return []
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        now = time.time()
+        with self.write() as db:
+            inserted = db.execute(
+                'INSERT INTO cache (key, value, size, expires, accessed) '
+                'VALUES (?, ?, ?, ?, ?) ON CONFLICT (key) DO UPDATE SET '
+                'value = excluded.value, size = excluded.size, '
+                'expires = excluded.expires, accessed = excluded.accessed '
+                'WHERE cache.expires <= ?',
+                (self.key(key, version), *dump(value),
+                 self.get_backend_timeout(timeout), now, now),
+            ).rowcount
+            self.cull()
+        return inserted == 1
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        now = time.time()
+        with self.write() as db:
+            return db.execute(
+                'UPDATE cache SET expires = ?, accessed = ? WHERE key = ? '
+                'AND (expires IS NULL OR expires > ?)',
+                (self.get_backend_timeout(timeout), now,
+                 self.key(key, version), now),
+            ).rowcount == 1
+
+    def incr(self, key, delta=1, version=None):
+        name = self.key(key, version)
+        now = time.time()
+        # UPDATE и чтение результата в одной транзакции записи.
+        with self.write() as db:
+            updated = db.execute(
+                'UPDATE cache SET value = value + ?, accessed = ? '
+                "WHERE key = ? AND typeof(value) = 'integer' "
+                'AND (expires IS NULL OR expires > ?)',
+                (delta, now, name, now),
+            ).rowcount
+            if updated:
+                return db.execute(
+                    'SELECT value FROM cache WHERE key = ?', (name,)
+                ).fetchone()[0]
+        # Не целое значение: обычный get/set, как в BaseCache.
+        return super().incr(key, delta, version)
+
+    def delete(self, key, version=None):
+        self.delete_many([key], version)
+
+    def delete_many(self, keys, version=None):
+        with self.write() as db:
+            db.executemany(
+                'DELETE FROM cache WHERE key = ?',
+                [(self.key(key, version),) for key in keys],
+            )
+
+    def has_key(self, key, version=None):
+        return self.db.execute(
+            'SELECT 1 FROM cache WHERE key = ? '
+            'AND (expires IS NULL OR expires > ?)',
+            (self.key(key, version), time.time()),
+        ).fetchone() is not None
+
+    def clear(self):
+        with self.write() as db:
+            db.execute('DELETE FROM cache')
+
+    def size(self):
+        return self.db.execute(
+            'SELECT total FROM cache_size'
+        ).fetchone()[0]
+
+    def cull(self):
+        """Вытесняет просроченные, затем давно не читанные записи."""
+        if self.size() <= self.max_size:
+            return
+        self.db.execute(
+            'DELETE FROM cache WHERE expires <= ?', (time.time(),)
+        )
+        excess = self.size() - self.max_size * CULL_TARGET
+        if excess <= 0:
+            return
+        # Самые старые по чтению записи, в сумме не меньше excess байт.
+        self.db.execute(
+            'DELETE FROM cache WHERE key IN ('
+            'SELECT key FROM (SELECT key, SUM(size) OVER ('
+            'ORDER BY accessed ROWS UNBOUNDED PRECEDING) - size AS freed '
+            'FROM cache) WHERE freed < ?)',
+            (excess,),
+        )
+
+    def close(self, **kwargs):
+        """Соединения живут всё время потока: открывать их дорого."""
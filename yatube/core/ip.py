@@ -0,0 +1,23 @@
+"""Адрес клиента за обратным прокси.
+
+За прокси REMOTE_ADDR - адрес самого прокси, одинаковый для всех
+клиентов. Адрес клиента берётся из заголовка CLIENT_IP_HEADER, который
+выставляет свой прокси (например, HTTP_X_FORWARDED_FOR). В списке через
+запятую верить можно только последнему адресу: его дописал свой прокси,
+остальные прислал клиент.
+"""
+import ipaddress
+
+from django.conf import settings
+
+
+def client_ip(request):
+    header = getattr(settings, 'CLIENT_IP_HEADER', '')
+    forwarded = header and request.META.get(header, '')
+    if forwarded:
+        address = forwarded.split(',')[-1].strip()
+        try:
+            return str(ipaddress.ip_address(address))
+        except ValueError:
+            pass
+    return request.META.get('REMOTE_ADDR')
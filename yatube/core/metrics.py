@@ -0,0 +1,98 @@
+"""Гистограммы времени запросов в памяти процесса.
+
+Формат вывода - текстовый формат Prometheus: каждая гистограмма даёт
+накопительные счётчики _bucket по границам, _sum и _count с меткой view.
+"""
+import bisect
+import threading
+from collections import defaultdict
+
+SECONDS_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+QUERIES_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+
+class Histogram:
+    def __init__(self, name, help_text, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        # На метку: попадания в каждый интервал (+Inf последним) и сумма.
+        self.counts = defaultdict(lambda: [0] * (len(buckets) + 1))
+        self.sums = defaultdict(float)
+        self.lock = threading.Lock()
+
+    def observe(self, label, value):
+        position = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            self.counts[label][position] += 1
+            self.sums[label] += value
+
+    def reset(self):
+        with self.lock:
+            self.counts.clear()
+            self.sums.clear()
+
+    def render(self):
+        lines = [
+            f'# HELP {self.name} {self.help_text}',
+            f'# TYPE {self.name} histogram',
+        ]
+        with self.lock:
+            snapshot = sorted(
+                (label, list(counts), self.sums[label])
+                for label, counts in self.counts.items()
+            )
+        bounds = [repr(float(bound)) for bound in self.buckets] + ['+Inf']
+        for label, counts, total in snapshot:
+            label = label.replace('\\', '\\\\').replace('"', '\\"')
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                lines.append(
+                    f'{self.name}_bucket{{view="{label}",le="{bound}"}} '
+                    f'{cumulative}'
+                )
+            lines.append(f'{self.name}_sum{{view="{label}"}} {total!r}')
+            lines.append(f'{self.name}_count{{view="{label}"}} {cumulative}')
+        return '\n'.join(lines)
+
+
+REQUEST_DURATION = Histogram(
+    'yatube_request_duration_seconds',
+    'Полное время обработки запроса.',
+    SECONDS_BUCKETS,
+)
+SQL_QUERIES = Histogram(
+    'yatube_request_sql_queries',
+    'Число SQL-запросов на запрос.',
+    QUERIES_BUCKETS,
+)
+SQL_DURATION = Histogram(
+    'yatube_request_sql_duration_seconds',
+    'Суммарное время SQL-запросов на запрос.',
+    SECONDS_BUCKETS,
+)
+TEMPLATE_DURATION = Histogram(
+    'yatube_request_template_duration_seconds',
+    'Время рендеринга шаблонов на запрос.',
+    SECONDS_BUCKETS,
+)
+HISTOGRAMS = (REQUEST_DURATION, SQL_QUERIES, SQL_DURATION, TEMPLATE_DURATION)
+
+
+def observe(view, duration, sql_count, sql_time, template_time):
+    REQUEST_DURATION.observe(view, duration)
+    SQL_QUERIES.observe(view, sql_count)
+    SQL_DURATION.observe(view, sql_time)
+    TEMPLATE_DURATION.observe(view, template_time)
+
+
+def reset():
+    for histogram in HISTOGRAMS:
+        histogram.reset()
+
+
+def render():
+    return '\n'.join(histogram.render() for histogram in HISTOGRAMS) + '\n'
@@ -0,0 +1,87 @@
+"""Замер времени запроса, SQL и рендеринга шаблонов по имени URL.
+
+Когда METRICS_ENABLED выключен, middleware снимается с конвейера при
+старте (MiddlewareNotUsed) и ничего не стоит. Включённый - это один
+execute_wrapper на соединение и обёртка над рендерингом шаблона.
+"""
+import functools
+import threading
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.template.backends.django import Template
+
+from . import metrics
+
+UNRESOLVED = '<unresolved>'
+METRICS_VIEW = 'metrics'
+
+state = threading.local()
+
+
+def timed_render(render):
+    """Время только внешнего рендеринга: вложенные не считаются дважды."""
+    @functools.wraps(render)
+    def wrapper(self, *args, **kwargs):
+        if not getattr(state, 'active', False) or state.rendering:
+            return render(self, *args, **kwargs)
+        state.rendering = True
+        start = time.perf_counter()
+        try:
+            return render(self, *args, **kwargs)
+        finally:
+            state.template_time += time.perf_counter() - start
+            state.rendering = False
+    wrapper.timed = True
+    return wrapper
+
+
+class QueryStats:
+    """SQL одного запроса, включая запросы из потоков posts.concurrent."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.count = 0
+        self.time = 0.0
+
+    def count_query(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            with self.lock:
+                self.count += 1
+                self.time += duration
+
+
+class MetricsMiddleware:
+    def __init__(self, get_response):
+        if not getattr(settings, 'METRICS_ENABLED', False):
+            raise MiddlewareNotUsed
+        if not getattr(Template.render, 'timed', False):
+            Template.render = timed_render(Template.render)
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state.active = True
+        state.rendering = False
+        state.template_time = 0.0
+        queries = QueryStats()
+        start = time.perf_counter()
+        try:
+            with connection.execute_wrapper(queries.count_query):
+                response = self.get_response(request)
+        finally:
+            state.active = False
+        duration = time.perf_counter() - start
+        match = request.resolver_match
+        view = match.view_name if match else UNRESOLVED
+        if view != METRICS_VIEW:
+            metrics.observe(
+                view, duration,
+                queries.count, queries.time, state.template_time,
+            )
+        return response
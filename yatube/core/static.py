@@ -0,0 +1,79 @@
+"""Раздача собранной статики без отдельного веб-сервера.
+
+Файлы с хешем в имени не меняются никогда и получают годовой
+immutable-кеш. Если клиент принимает br или gzip и при сборке была
+записана сжатая копия, отдаётся она.
+"""
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.http import FileResponse, Http404, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+HASHED = re.compile(r'\.[0-9a-f]{12}\.[^./]+$')
+IMMUTABLE = 'public, max-age=31536000, immutable'
+REVALIDATE = 'public, max-age=0, must-revalidate'
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def accepted_encodings(header):
+    accepted = set()
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        quality = params.strip().partition('q=')[2]
+        try:
+            if quality and float(quality) == 0:
+                continue
+        except ValueError:
+            continue
+        accepted.add(coding.strip().lower())
+    return accepted
+
+
+def find(path):
+    if settings.STATIC_ROOT:
+        try:
+            full_path = safe_join(settings.STATIC_ROOT, path)
+        except ValueError:
+            raise Http404
+        if os.path.isfile(full_path):
+            return full_path
+    # Статика не собрана: исходный файл из STATICFILES_DIRS и приложений.
+    full_path = finders.find(path)
+    if not full_path or not os.path.isfile(full_path):
+        raise Http404
+    return full_path
+
+
+def serve(request, path):
+    full_path = find(path)
+    content_type, _ = mimetypes.guess_type(full_path)
+    accepted = accepted_encodings(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+    encoding = None
+    for coding, suffix in ENCODINGS:
+        if coding in accepted and os.path.isfile(full_path + suffix):
+            full_path += suffix
+            encoding = coding
+            break
+    stat = os.stat(full_path)
+    cache_control = IMMUTABLE if HASHED.search(path) else REVALIDATE
+    if not was_modified_since(
+        request.META.get('HTTP_IF_MODIFIED_SINCE'), stat.st_mtime, stat.st_size
+    ):
+        response = HttpResponseNotModified()
+    else:
+        response = FileResponse(
+            open(full_path, 'rb'),
+            content_type=content_type or 'application/octet-stream',
+        )
+        response['Last-Modified'] = http_date(stat.st_mtime)
+        if encoding:
+            response['Content-Encoding'] = encoding
+    response['Cache-Control'] = cache_control
+    response['Vary'] = 'Accept-Encoding'
+    return response
@@ -0,0 +1,57 @@
+"""Статика с хешем в имени и заранее сжатыми копиями.
+
+collectstatic пишет рядом с каждым текстовым файлом копии .gz и, если
+установлен пакет brotli, .br. Сжатие делается один раз при сборке, а не
+на каждый запрос; отдаёт их core.static.serve.
+"""
+import gzip
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE = ('.css', '.js', '.svg', '.txt', '.html', '.json', '.xml',
+                '.ico')
+
+
+def compressors():
+    yield '.gz', lambda data: gzip.compress(data, 9, mtime=0)
+    if brotli is not None:
+        yield '.br', lambda data: brotli.compress(data)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            # Статика не собрана (разработка, тесты): исходное имя файла
+            # отдаётся через finders.
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        for name, hashed_name, processed in super().post_process(
+            paths, dry_run, **options
+        ):
+            yield name, hashed_name, processed
+            if dry_run or isinstance(processed, Exception):
+                continue
+            for path in {name, hashed_name}:
+                if path and path.endswith(COMPRESSIBLE):
+                    self.compress(path)
+
+    def compress(self, path):
+        with self.open(path) as source:
+            data = source.read()
+        for suffix, compress in compressors():
+            compressed = compress(data)
+            if len(compressed) >= len(data):
+                continue
+            if self.exists(path + suffix):
+                self.delete(path + suffix)
+            self._save(path + suffix, ContentFile(compressed))
@@ -0,0 +1,50 @@
+"""Прогрев кеширующего загрузчика шаблонов при старте воркера.
+
+cached.Loader компилирует шаблон при первом обращении, и первые запросы
+каждого воркера платят за разбор всех шаблонов страницы. warm_templates()
+заранее компилирует все шаблоны проекта и приложений.
+"""
+import logging
+import os
+
+from django.template import TemplateDoesNotExist, TemplateSyntaxError, engines
+from django.template.backends.django import DjangoTemplates
+from django.template.loaders.cached import Loader as CachedLoader
+from django.template.utils import get_app_template_dirs
+
+logger = logging.getLogger(__name__)
+
+EXTENSIONS = ('.html', '.txt', '.xml')
+
+
+def template_names(directories):
+    for directory in directories:
+        for root, _, files in os.walk(directory):
+            for name in files:
+                if name.endswith(EXTENSIONS):
+                    yield os.path.relpath(
+                        os.path.join(root, name), directory
+                    ).replace(os.sep, '/')
+
+
+def warm_templates():
+    """Компилирует шаблоны движков с cached.Loader; возвращает их число."""
+    compiled = 0
+    for backend in engines.all():
+        if not isinstance(backend, DjangoTemplates):
+            continue
+        engine = backend.engine
+        if not any(
+            isinstance(loader, CachedLoader)
+            for loader in engine.template_loaders
+        ):
+            continue
+        directories = [*engine.dirs, *get_app_template_dirs('templates')]
+        for name in set(template_names(directories)):
+            try:
+                engine.get_template(name)
+            except (TemplateDoesNotExist, TemplateSyntaxError) as error:
+                logger.warning('Шаблон %s не прогрет: %s', name, error)
+            else:
+                compiled += 1
+    return compiled
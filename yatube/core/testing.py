@@ -0,0 +1,26 @@
+"""Окружение тестов: собственный файл кеша вместо файла проекта."""
+import contextlib
+import copy
+import os
+import tempfile
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+@contextlib.contextmanager
+def isolated_cache():
+    """Кеши во временном каталоге, который удаляется после тестов."""
+    with tempfile.TemporaryDirectory(prefix='yatube-test-') as directory:
+        caches = copy.deepcopy(settings.CACHES)
+        for alias, options in caches.items():
+            options['LOCATION'] = os.path.join(directory, f'{alias}.sqlite3')
+        with override_settings(CACHES=caches):
+            yield
+
+
+class TestRunner(DiscoverRunner):
+    def run_tests(self, *args, **kwargs):
+        with isolated_cache():
+            return super().run_tests(*args, **kwargs)
@@ -0,0 +1,92 @@
+import multiprocessing
+import os
+import tempfile
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from ..cache import SQLiteCache
+
+
+def increment(location, times):
+    cache = SQLiteCache(location, {})
+    for _ in range(times):
+        cache.incr('counter')
+
+
+class SQLiteCacheTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.location = os.path.join(directory.name, 'cache.sqlite3')
+        self.cache = SQLiteCache(self.location, {})
+
+    def test_get_set_delete(self):
+        """Значения сохраняются, читаются пачкой и удаляются"""
+        self.cache.set('key', {'value': [1, 2]})
+        self.assertEqual(self.cache.get('key'), {'value': [1, 2]})
+        self.assertEqual(
+            self.cache.get_many(['key', 'missing']), {'key': {'value': [1, 2]}}
+        )
+        self.cache.delete('key')
+        self.assertIsNone(self.cache.get('key'))
+
+    def test_add_and_expiry(self):
+        """add не перезаписывает живую запись, истёкшая не читается"""
+        self.assertTrue(self.cache.add('key', 'first', timeout=10))
+        self.assertFalse(self.cache.add('key', 'second'))
+        with mock.patch('time.time', return_value=time.time() + 20):
+            self.assertIsNone(self.cache.get('key'))
+            self.assertTrue(self.cache.add('key', 'third'))
+            self.assertEqual(self.cache.get('key'), 'third')
+
+    def test_incr(self):
+        """incr и decr меняют число, для отсутствующего ключа - ValueError"""
+        self.cache.set('counter', 10)
+        self.assertEqual(self.cache.incr('counter'), 11)
+        self.assertEqual(self.cache.decr('counter', 5), 6)
+        with self.assertRaises(ValueError):
+            self.cache.incr('missing')
+
+    def test_incr_is_atomic_across_processes(self):
+        """Счётчик, общий для процессов, не теряет увеличений"""
+        self.cache.set('counter', 0)
+        context = multiprocessing.get_context('fork')
+        workers = [
+            context.Process(target=increment, args=(self.location, 100))
+            for _ in range(4)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        self.assertEqual(self.cache.get('counter'), 400)
+
+    def test_shared_between_instances(self):
+        """Запись одного экземпляра видна другому с тем же файлом"""
+        other = SQLiteCache(self.location, {})
+        self.cache.set('key', 'value')
+        self.assertEqual(other.get('key'), 'value')
+        other.delete('key')
+        self.assertIsNone(self.cache.get('key'))
+
+    def test_lru_eviction(self):
+        """При превышении размера вытесняются давно не читанные записи"""
+        cache = SQLiteCache(
+            os.path.join(os.path.dirname(self.location), 'small.sqlite3'),
+            {'OPTIONS': {'MAX_SIZE': 10_000}},
+        )
+        start = time.time()
+        for number in range(8):
+            with mock.patch('time.time', return_value=start + number * 2):
+                cache.set(number, b'x' * 1000)
+        with mock.patch('time.time', return_value=start + 20):
+            cache.get(0)
+        with mock.patch('time.time', return_value=start + 22):
+            for number in range(8, 12):
+                cache.set(number, b'x' * 1000)
+        self.assertLessEqual(cache.size(), 10_000)
+        self.assertIsNotNone(cache.get(0))
+        self.assertIsNone(cache.get(1))
+        self.assertIsNotNone(cache.get(11))
@@ -0,0 +1,29 @@
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from ..ip import client_ip
+
+
+class ClientIpTests(SimpleTestCase):
+    def request(self, **meta):
+        return RequestFactory().get('/', REMOTE_ADDR='127.0.0.1', **meta)
+
+    def test_remote_addr_without_proxy_header(self):
+        """Без CLIENT_IP_HEADER заголовки клиента не читаются."""
+        self.assertEqual(client_ip(self.request(
+            HTTP_X_FORWARDED_FOR='10.0.0.1'
+        )), '127.0.0.1')
+
+    @override_settings(CLIENT_IP_HEADER='HTTP_X_FORWARDED_FOR')
+    def test_last_forwarded_address(self):
+        """Из списка берётся адрес, дописанный своим прокси."""
+        self.assertEqual(client_ip(self.request(
+            HTTP_X_FORWARDED_FOR='1.1.1.1, 10.0.0.1'
+        )), '10.0.0.1')
+        self.assertEqual(client_ip(self.request()), '127.0.0.1')
+
+    @override_settings(CLIENT_IP_HEADER='HTTP_X_FORWARDED_FOR')
+    def test_invalid_forwarded_address(self):
+        """Не адрес в заголовке - REMOTE_ADDR."""
+        self.assertEqual(client_ip(self.request(
+            HTTP_X_FORWARDED_FOR='unknown'
+        )), '127.0.0.1')
@@ -0,0 +1,74 @@
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post, User
+
+from .. import metrics
+
+METRICS = reverse('metrics')
+INDEX = reverse('posts:index')
+
+
+@override_settings(METRICS_ENABLED=True)
+class MetricsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        Post.objects.create(author=cls.user, text='Тестовый пост')
+
+    def setUp(self):
+        metrics.reset()
+        self.addCleanup(metrics.reset)
+
+    def test_view_is_observed_by_url_name(self):
+        """Запрос попадает во все гистограммы под именем URL"""
+        self.client.get(INDEX)
+        text = self.client.get(METRICS).content.decode()
+        for name in (
+            'yatube_request_duration_seconds',
+            'yatube_request_sql_queries',
+            'yatube_request_sql_duration_seconds',
+            'yatube_request_template_duration_seconds',
+        ):
+            with self.subTest(name=name):
+                self.assertIn(f'{name}_count{{view="posts:index"}} 1', text)
+        self.assertNotIn('view="metrics"', text)
+
+    def test_sql_queries_are_counted(self):
+        """SQL-запросы и рендеринг шаблонов учитываются"""
+        self.client.get(INDEX)
+        count = metrics.SQL_QUERIES.sums['posts:index']
+        self.assertGreater(count, 0)
+        self.assertGreater(
+            metrics.TEMPLATE_DURATION.sums['posts:index'], 0
+        )
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Счётчики интервалов накопительные, как в Prometheus"""
+        histogram = metrics.Histogram('test', 'Тест', (1, 10))
+        for value in (0.5, 5, 50):
+            histogram.observe('view', value)
+        text = histogram.render()
+        self.assertIn('test_bucket{view="view",le="1.0"} 1', text)
+        self.assertIn('test_bucket{view="view",le="10.0"} 2', text)
+        self.assertIn('test_bucket{view="view",le="+Inf"} 3', text)
+        self.assertIn('test_sum{view="view"} 55.5', text)
+
+    def test_endpoint_is_local_only(self):
+        """Чужим адресам эндпоинт не отдаётся"""
+        response = self.client.get(METRICS, REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(CLIENT_IP_HEADER='HTTP_X_FORWARDED_FOR')
+    def test_endpoint_checks_address_behind_proxy(self):
+        """За прокси проверяется адрес клиента, а не адрес прокси"""
+        response = self.client.get(
+            METRICS, REMOTE_ADDR='127.0.0.1', HTTP_X_FORWARDED_FOR='10.0.0.1'
+        )
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(METRICS_ENABLED=False)
+    def test_disabled_endpoint_is_not_found(self):
+        """Выключенные метрики отвечают 404"""
+        self.assertEqual(self.client.get(METRICS).status_code, 404)
@@ -0,0 +1,64 @@
+import gzip
+import shutil
+import tempfile
+
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+
+STATIC_ROOT = tempfile.mkdtemp()
+CSS = 'css/bootstrap.min.css'
+
+
+@override_settings(STATIC_ROOT=STATIC_ROOT)
+class StaticFilesTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        call_command('collectstatic', interactive=False, verbosity=0)
+        cls.hashed = staticfiles_storage.url(CSS)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(STATIC_ROOT, ignore_errors=True)
+
+    def test_hashed_name_and_compressed_siblings(self):
+        """collectstatic пишет имена с хешем и сжатые копии"""
+        self.assertRegex(self.hashed, r'bootstrap\.min\.[0-9a-f]{12}\.css$')
+        name = staticfiles_storage.stored_name(CSS)
+        self.assertTrue(staticfiles_storage.exists(name + '.gz'))
+
+    def test_precompressed_immutable_response(self):
+        """Хешированный файл отдаётся сжатым и с immutable-кешем"""
+        response = self.client.get(
+            self.hashed, HTTP_ACCEPT_ENCODING='br;q=0, gzip, deflate'
+        )
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        body = gzip.decompress(b''.join(response.streaming_content))
+        with staticfiles_storage.open(CSS) as source:
+            self.assertEqual(body, source.read())
+
+    def test_plain_response_without_accept_encoding(self):
+        """Без Accept-Encoding файл отдаётся несжатым и без immutable"""
+        response = self.client.get('/static/' + CSS)
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertNotIn('immutable', response['Cache-Control'])
+
+    def test_missing_file(self):
+        """Отсутствующий файл - 404"""
+        self.assertEqual(
+            self.client.get('/static/css/missing.css').status_code, 404
+        )
+
+
+class UncollectedStaticTests(SimpleTestCase):
+    def test_falls_back_to_source_files(self):
+        """Без collectstatic шаблоны и раздача работают с исходными именами"""
+        self.assertEqual(staticfiles_storage.url(CSS), '/static/' + CSS)
+        response = self.client.get('/static/' + CSS)
+        self.assertEqual(response.status_code, 200)
+        response.close()
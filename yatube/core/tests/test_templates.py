@@ -0,0 +1,19 @@
+from django.template import engines
+from django.test import SimpleTestCase
+
+from core.templates import warm_templates
+
+
+class WarmTemplatesTests(SimpleTestCase):
+    def test_templates_compiled_ahead(self):
+        """Прогрев кладёт шаблоны проекта в кеш загрузчика"""
+        loader = engines['django'].engine.template_loaders[0]
+        loader.reset()
+        self.assertGreater(warm_templates(), 0)
+        for name in (
+            'posts/includes/post.html',
+            'posts/includes/post_body.html',
+            'admin/base.html',
+        ):
+            with self.subTest(name=name):
+                self.assertIn(name, loader.get_template_cache)
@@ -1,5 +1,10 @@
+from django.conf import settings
+from django.http import Http404, HttpResponse
 from django.shortcuts import render
 
+from . import metrics as request_metrics
+from .ip import client_ip
+
 
 def page_not_found(request, exception):
     return render(request, 'core/404.html', {'path': request.path}, status=404)
@@ -11,3 +16,16 @@ def csrf_failure(request, reason=''):
 
 def server_error(reqest):
     return render(reqest, 'core/500.html', status=500)
+
+
+def metrics(request):
+    """Гистограммы запросов в формате Prometheus, только для своих адресов."""
+    if (
+        not settings.METRICS_ENABLED
+        or client_ip(request) not in settings.METRICS_ALLOWED_IPS
+    ):
+        raise Http404
+    return HttpResponse(
+        request_metrics.render(),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import Post, Group, Comment, Follow
+from .models import Post, Group, Comment, Follow, Suggestion
 
 
 @admin.register(Post)
@@ -41,3 +41,13 @@ class FollowAdmin(admin.ModelAdmin):
         'author',
     )
     list_filter = ('author',)
+
+
+@admin.register(Suggestion)
+class SuggestionAdmin(admin.ModelAdmin):
+    list_display = (
+        'user',
+        'author',
+        'score',
+    )
+    list_filter = ('user',)
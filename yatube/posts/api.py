@@ -0,0 +1,240 @@
+"""JSON API только для чтения: посты, группы, комментарии, лента подписок.
+
+Строки читаются через values(): без экземпляров моделей и без запросов
+на каждый объект, автор и группа приходят в том же JOIN, а счётчики
+поста уже лежат в его строке. ?fields=id,text выбирает поля ответа и
+сужает SELECT. Списки листаются курсором (?cursor=), ответы получают
+ETag из версий лент, как и HTML-страницы.
+"""
+import hashlib
+
+from django.core.files.storage import default_storage
+from django.db.models import OuterRef
+from django.http import JsonResponse
+from django.utils.cache import get_conditional_response
+from django.views.decorators.http import require_GET
+
+from . import feed_cache
+from .conditional import conditional_page, get_state
+from .models import Comment, Group, Post, User, count_subquery
+from .paginator import CursorPaginator
+from .settings import API_PAGE_LIMIT
+from .timeline import timeline_posts
+
+
+def image_url(name):
+    return default_storage.url(name) if name else None
+
+
+class Resource:
+    """Поля ответа: имя -> (путь для values(), преобразование)."""
+    fields = {}
+    ordering = ('-id',)
+
+    def __init__(self, requested):
+        self.names = list(self.fields)
+        if requested:
+            self.names = [name.strip() for name in requested.split(',')]
+        unknown = set(self.names) - set(self.fields)
+        if unknown:
+            raise ValueError(', '.join(sorted(unknown)))
+
+    def values(self, queryset):
+        lookups = {self.fields[name][0] for name in self.names}
+        lookups.update(field.lstrip('-') for field in self.ordering)
+        return queryset.values(*lookups)
+
+    def serialize(self, row):
+        result = {}
+        for name in self.names:
+            lookup, convert = self.fields[name]
+            value = row[lookup]
+            result[name] = convert(value) if convert else value
+        return result
+
+
+class PostResource(Resource):
+    fields = {
+        'id': ('id', None),
+        'text': ('text', None),
+        'pub_date': ('pub_date', None),
+        'modified': ('modified', None),
+        'author': ('author__username', None),
+        'group': ('group__slug', None),
+        'image': ('image', image_url),
+        'likes_count': ('likes_count', None),
+        'comments_count': ('comments_count', None),
+    }
+    ordering = ('-pub_date', '-id')
+
+
+class CommentResource(Resource):
+    fields = {
+        'id': ('id', None),
+        'post': ('post_id', None),
+        'text': ('text', None),
+        'created': ('created', None),
+        'author': ('author__username', None),
+    }
+    ordering = ('-created', '-id')
+
+
+class GroupResource(Resource):
+    fields = {
+        'id': ('id', None),
+        'title': ('title', None),
+        'slug': ('slug', None),
+        'description': ('description', None),
+        'posts_count': ('posts_count', None),
+    }
+    ordering = ('id',)
+
+
+def error(message, status):
+    return JsonResponse({'detail': message}, status=status)
+
+
+def page_url(request, cursor):
+    if not cursor:
+        return None
+    query = request.GET.copy()
+    query['cursor'] = cursor
+    return request.build_absolute_uri(f'{request.path}?{query.urlencode()}')
+
+
+def respond(data):
+    return JsonResponse(data, json_dumps_params={'ensure_ascii': False})
+
+
+def with_body_etag(request, response):
+    """ETag по телу ответа для страниц без версии ленты."""
+    if response.status_code != 200:
+        return response
+    response['ETag'] = '"{}"'.format(hashlib.md5(response.content).hexdigest())
+    return get_conditional_response(
+        request, etag=response['ETag'], response=response
+    )
+
+
+def list_response(request, resource_class, queryset):
+    try:
+        resource = resource_class(request.GET.get('fields'))
+    except ValueError as unknown:
+        return error(f'Неизвестные поля: {unknown}', 400)
+    page = CursorPaginator(
+        resource.values(queryset), API_PAGE_LIMIT, resource.ordering
+    ).get_page(request.GET.get('cursor'))
+    return respond({
+        'results': [resource.serialize(row) for row in page],
+        'next': page_url(request, page.next_cursor),
+        'previous': page_url(request, page.previous_cursor),
+    })
+
+
+def detail_response(request, resource_class, queryset):
+    try:
+        resource = resource_class(request.GET.get('fields'))
+    except ValueError as unknown:
+        return error(f'Неизвестные поля: {unknown}', 400)
+    row = resource.values(queryset).first()
+    if row is None:
+        return error('Не найдено', 404)
+    return respond(resource.serialize(row))
+
+
+def posts_state(request):
+    feeds = []
+    group = request.GET.get('group')
+    author = request.GET.get('author')
+    if group:
+        feeds += [
+            feed_cache.group_feed(pk) for pk in Group.objects.filter(
+                slug=group).values_list('pk', flat=True)
+        ]
+    if author:
+        feeds += [
+            feed_cache.author_feed(pk) for pk in User.objects.filter(
+                username=author).values_list('pk', flat=True)
+        ]
+    if (group or author) and not feeds:
+        return None
+    return get_state(
+        request, feeds or [feed_cache.GLOBAL_FEED], personal=False
+    )
+
+
+def post_state(request, post_id):
+    post = Post.objects.filter(pk=post_id).values(
+        'author_id', 'modified'
+    ).first()
+    if post is None:
+        return None
+    return get_state(
+        request, [feed_cache.author_feed(post['author_id'])],
+        post['modified'], personal=False,
+    )
+
+
+def groups_state(request, slug=None):
+    # Число постов группы меняется с любым постом, правка группы
+    # тоже сдвигает общую ленту.
+    return get_state(request, [feed_cache.GLOBAL_FEED], personal=False)
+
+
+@require_GET
+@conditional_page(posts_state)
+def posts(request):
+    queryset = Post.objects.all()
+    if request.GET.get('group'):
+        queryset = queryset.filter(group__slug=request.GET['group'])
+    if request.GET.get('author'):
+        queryset = queryset.filter(author__username=request.GET['author'])
+    return list_response(request, PostResource, queryset)
+
+
+@require_GET
+@conditional_page(post_state)
+def post(request, post_id):
+    return detail_response(
+        request, PostResource, Post.objects.filter(pk=post_id)
+    )
+
+
+@require_GET
+@conditional_page(post_state)
+def post_comments(request, post_id):
+    if not Post.objects.filter(pk=post_id).exists():
+        return error('Не найдено', 404)
+    return list_response(
+        request, CommentResource, Comment.objects.filter(post=post_id)
+    )
+
+
+def groups_queryset():
+    return Group.objects.annotate(posts_count=count_subquery(
+        Post.objects.filter(group=OuterRef('pk')), 'group'
+    ))
+
+
+@require_GET
+@conditional_page(groups_state)
+def groups(request):
+    return list_response(request, GroupResource, groups_queryset())
+
+
+@require_GET
+@conditional_page(groups_state)
+def group(request, slug):
+    return detail_response(
+        request, GroupResource, groups_queryset().filter(slug=slug)
+    )
+
+
+@require_GET
+def follow(request):
+    """Лента подписок зависит от пользователя: ETag считается по телу."""
+    if not request.user.is_authenticated:
+        return error('Нужна авторизация', 401)
+    return with_body_etag(request, list_response(
+        request, PostResource, timeline_posts(request.user)
+    ))
@@ -0,0 +1,58 @@
+"""Одновременное выполнение независимых запросов представления.
+
+Django 2.2 не поддерживает ASGI и асинхронные представления, поэтому
+независимые запросы одной страницы (лента, счётчики автора, подписка)
+уходят в общий пул потоков, у каждого из которых своё соединение с
+базой. Соединение потока пула живёт вместе с потоком и не открывается
+заново на каждую задачу; обёртки execute_wrapper потока запроса (счётчики
+метрик) действуют и на запросы задач. Внутри транзакции (ATOMIC_REQUESTS,
+тесты) другие соединения не видят её изменений, и тогда запросы
+выполняются по очереди.
+
+Задачи должны вычислять свои QuerySet сами: ленивый QuerySet из задачи
+выполнится уже в потоке запроса.
+"""
+import contextlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connection
+
+from .settings import VIEW_QUERY_WORKERS
+
+executor = None
+executor_lock = threading.Lock()
+
+
+def get_executor():
+    global executor
+    with executor_lock:
+        if executor is None:
+            executor = ThreadPoolExecutor(
+                max_workers=VIEW_QUERY_WORKERS,
+                thread_name_prefix='view-queries',
+            )
+    return executor
+
+
+def run(function, wrappers):
+    # После ошибки БД соединение могло сломаться: следующий запрос откроет
+    # новое.
+    if connection.errors_occurred:
+        connection.close()
+    with contextlib.ExitStack() as stack:
+        for wrapper in wrappers:
+            stack.enter_context(connection.execute_wrapper(wrapper))
+        return function()
+
+
+def gather(*functions):
+    """Результаты функций по порядку; первая считается в своём потоке."""
+    if not VIEW_QUERY_WORKERS or connection.in_atomic_block:
+        return [function() for function in functions]
+    first, *rest = functions
+    wrappers = list(connection.execute_wrappers)
+    futures = [
+        get_executor().submit(run, function, wrappers) for function in rest
+    ]
+    return [first()] + [future.result() for future in futures]
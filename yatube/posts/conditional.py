@@ -0,0 +1,97 @@
+"""Условный GET для лент и страницы поста.
+
+ETag строится из версий лент в кеше (feed_cache) без запроса ленты и
+рендеринга шаблона. Версии увеличиваются при любом
+изменении, видимом на странице: посте, лайке, комментарии, подписке.
+Разметка зависит от пользователя и его CSRF-токена, поэтому они тоже
+входят в ETag; общие для всех страницы (RSS/Atom) строятся с
+personal=False.
+
+Last-Modified не отдаётся: с точностью HTTP-даты в секунду изменение в
+ту же секунду, что и ответ 304, осталось бы незамеченным.
+"""
+import hashlib
+
+from django.conf import settings
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+
+from . import feed_cache
+from .models import Group, Post, User
+
+
+def get_state(request, feeds, modified=None, personal=True):
+    """ETag страницы, собранной из лент feeds."""
+    parts = [request.get_full_path()]
+    if personal:
+        parts += [
+            request.user.pk, request.COOKIES.get(settings.CSRF_COOKIE_NAME)
+        ]
+    if modified:
+        parts.append(modified.isoformat())
+    parts += [feed_cache.get_version(feed) for feed in feeds]
+    return hashlib.md5(repr(parts).encode()).hexdigest()
+
+
+def index_state(request, personal=True):
+    return get_state(request, [feed_cache.GLOBAL_FEED], personal=personal)
+
+
+def trending_state(request, personal=True):
+    return get_state(
+        request, [feed_cache.TRENDING_FEED], personal=personal
+    )
+
+
+def group_state(request, slug, personal=True):
+    group_id = Group.objects.filter(slug=slug).values_list(
+        'pk', flat=True
+    ).first()
+    if group_id is None:
+        return None
+    return get_state(
+        request, [feed_cache.group_feed(group_id)], personal=personal
+    )
+
+
+def profile_state(request, username, personal=True):
+    author_id = User.objects.filter(username=username).values_list(
+        'pk', flat=True
+    ).first()
+    if author_id is None:
+        return None
+    feeds = [feed_cache.author_feed(author_id)]
+    if personal and request.user.is_authenticated:
+        # Блок «Кого читать»: новая сборка и подписки самого читателя.
+        feeds += [
+            feed_cache.SUGGESTIONS, feed_cache.author_feed(request.user.pk)
+        ]
+    return get_state(request, feeds, personal=personal)
+
+
+def post_state(request, post_id):
+    post = Post.objects.filter(pk=post_id).values(
+        'author_id', 'modified'
+    ).first()
+    if post is None:
+        return None
+    return get_state(
+        request, [feed_cache.author_feed(post['author_id'])],
+        post['modified'],
+    )
+
+
+def conditional_page(state):
+    """condition() с одним вычислением состояния на запрос.
+
+    no-cache заставляет браузер перепроверять страницу при каждом
+    открытии, а не держать её по эвристике.
+    """
+    def etag(request, *args, **kwargs):
+        if not hasattr(request, 'page_state'):
+            request.page_state = state(request, *args, **kwargs)
+        return request.page_state
+
+    def decorator(view):
+        return cache_control(no_cache=True)(condition(etag_func=etag)(view))
+    return decorator
@@ -0,0 +1,63 @@
+"""Версии лент для ключей фрагментного кеша.
+
+Каждая лента (общая, группы, автора) хранит в кеше счётчик поколений.
+Счётчик входит в ключ закешированного тела страницы, поэтому после
+изменения поста достаточно увеличить счётчик: старые фрагменты просто
+перестают читаться и вытесняются по таймауту. Из тех же счётчиков
+строится ETag для условного GET.
+"""
+import time
+
+from django.core.cache import cache
+
+GLOBAL_FEED = 'index'
+TRENDING_FEED = 'trending'
+# Не лента, а версия таблицы рекомендаций: входит в ETag профиля.
+SUGGESTIONS = 'suggestions'
+
+
+def group_feed(group_id):
+    return f'group:{group_id}'
+
+
+def author_feed(author_id):
+    return f'author:{author_id}'
+
+
+def post_feeds(post):
+    # Популярное тоже показывает карточки постов.
+    feeds = [GLOBAL_FEED, TRENDING_FEED, author_feed(post.author_id)]
+    if post.group_id:
+        feeds.append(group_feed(post.group_id))
+    return feeds
+
+
+def version_key(feed):
+    return f'feed-version:{feed}'
+
+
+def new_version():
+    # Вытесненный счётчик начинается с текущего времени в мс, а не с нуля,
+    # чтобы не совпасть со старыми фрагментами, ещё лежащими в кеше.
+    return time.time_ns() // 1_000_000
+
+
+def get_version(feed):
+    key = version_key(feed)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, new_version(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump(*feeds):
+    for feed in feeds:
+        try:
+            cache.incr(version_key(feed))
+        except ValueError:
+            cache.add(version_key(feed), new_version(), timeout=None)
+
+
+def bump_post(post):
+    bump(*post_feeds(post))
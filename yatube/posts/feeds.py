@@ -0,0 +1,139 @@
+"""RSS и Atom: общая лента, лента группы и лента автора.
+
+Посты берутся теми же запросами, что и в posts/views.py. Готовый ответ
+кешируется под ETag страницы: ETag меняется вместе с версией ленты при
+сохранении поста, лайке или комментарии, поэтому старые тела просто
+перестают читаться, а повторный опрос без изменений получает 304.
+"""
+import functools
+
+from django.contrib.syndication.views import Feed
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed
+from django.utils.text import Truncator
+
+from .conditional import (conditional_page, group_state, index_state,
+                          profile_state)
+from .models import Group, Post, User
+from .settings import (FEED_CACHE_TIMEOUT, SYNDICATION_LIMIT,
+                       SYNDICATION_TITLE_WORDS)
+
+
+def cached_feed(state):
+    """Условный GET и кеш тела ответа по ETag, общий для всех читателей."""
+    def decorator(view):
+        @conditional_page(functools.partial(state, personal=False))
+        def wrapper(request, *args, **kwargs):
+            page_state = getattr(request, 'page_state', None)
+            if not page_state:
+                return view(request, *args, **kwargs)
+            key = f'syndication:{page_state}'
+            cached = cache.get(key)
+            if cached is not None:
+                content, content_type = cached
+                return HttpResponse(content, content_type=content_type)
+            response = view(request, *args, **kwargs)
+            cache.set(
+                key,
+                (response.content, response['Content-Type']),
+                FEED_CACHE_TIMEOUT,
+            )
+            return response
+        return wrapper
+    return decorator
+
+
+class PostsFeed(Feed):
+    title = 'Yatube: последние записи'
+    description = 'Новые записи всех авторов'
+
+    def link(self):
+        return reverse('posts:index')
+
+    def items(self):
+        return Post.objects.for_feed()[:SYNDICATION_LIMIT]
+
+    def item_title(self, item):
+        return Truncator(item.text).words(SYNDICATION_TITLE_WORDS)
+
+    def item_description(self, item):
+        return item.text
+
+    def item_link(self, item):
+        return reverse('posts:post_detail', kwargs={'post_id': item.pk})
+
+    def item_pubdate(self, item):
+        return item.pub_date
+
+    def item_updateddate(self, item):
+        return item.modified
+
+    def item_author_name(self, item):
+        return item.author.get_full_name() or item.author.username
+
+    def item_categories(self, item):
+        return [item.group.title] if item.group else []
+
+
+class GroupFeed(PostsFeed):
+    def get_object(self, request, slug):
+        return get_object_or_404(Group, slug=slug)
+
+    def title(self, group):
+        return f'Yatube: {group.title}'
+
+    def description(self, group):
+        return group.description
+
+    def link(self, group):
+        return reverse('posts:group_list', kwargs={'slug': group.slug})
+
+    def items(self, group):
+        return group.posts.for_feed()[:SYNDICATION_LIMIT]
+
+
+class AuthorFeed(PostsFeed):
+    def get_object(self, request, username):
+        return get_object_or_404(User, username=username)
+
+    def title(self, author):
+        return f'Yatube: {author.get_full_name() or author.username}'
+
+    def description(self, author):
+        return f'Записи пользователя {author.username}'
+
+    def link(self, author):
+        return reverse('posts:profile', kwargs={'username': author.username})
+
+    def items(self, author):
+        return author.posts.for_feed()[:SYNDICATION_LIMIT]
+
+
+class AtomFeed:
+    feed_type = Atom1Feed
+    subtitle = PostsFeed.description
+
+
+class PostsAtomFeed(AtomFeed, PostsFeed):
+    pass
+
+
+class GroupAtomFeed(AtomFeed, GroupFeed):
+    def subtitle(self, group):
+        return group.description
+
+
+class AuthorAtomFeed(AtomFeed, AuthorFeed):
+    def subtitle(self, author):
+        return self.description(author)
+
+
+posts_rss = cached_feed(index_state)(PostsFeed())
+posts_atom = cached_feed(index_state)(PostsAtomFeed())
+group_rss = cached_feed(group_state)(GroupFeed())
+group_atom = cached_feed(group_state)(GroupAtomFeed())
+author_rss = cached_feed(profile_state)(AuthorFeed())
+author_atom = cached_feed(profile_state)(AuthorAtomFeed())
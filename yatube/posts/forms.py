@@ -1,6 +1,7 @@
 from django import forms
 from django.utils.translation import gettext_lazy as _
 
+from .images import clean_image
 from .models import Post, Comment
 
 
@@ -13,6 +14,9 @@ class PostForm(forms.ModelForm):
             'group': _('Выберите группу'),
         }
 
+    def clean_image(self):
+        return clean_image(self.cleaned_data.get('image'))
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
@@ -0,0 +1,83 @@
+"""Подготовка загруженной картинки поста перед сохранением.
+
+Файл читается из временного файла загрузки, а JPEG декодируется сразу
+в уменьшенном масштабе (draft), поэтому в памяти не оказывается полный
+кадр с камеры. Остальные форматы draft() не уменьшает, и для них
+действует меньший предел разрешения IMAGE_MAX_DECODED_PIXELS.
+Картинка поворачивается по EXIF, уменьшается до IMAGE_MAX_SIDE и
+пересохраняется без метаданных: JPEG - прогрессивным. Миниатюры потом
+нарезаются уже из небольшого файла.
+"""
+import tempfile
+
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import UploadedFile
+from django.template.defaultfilters import filesizeformat
+from PIL import Image, ImageOps
+
+from .settings import (IMAGE_JPEG_QUALITY, IMAGE_MAX_DECODED_PIXELS,
+                       IMAGE_MAX_PIXELS, IMAGE_MAX_SIDE, IMAGE_MAX_UPLOAD_SIZE,
+                       IMAGE_SPOOL_SIZE)
+
+# Форматы, которые пересохраняются; остальные (GIF с анимацией и т.п.)
+# только проверяются по размеру.
+REENCODED = {
+    'JPEG': {'optimize': True, 'progressive': True,
+             'quality': IMAGE_JPEG_QUALITY},
+    'PNG': {'optimize': True},
+    'WEBP': {'quality': IMAGE_JPEG_QUALITY},
+}
+
+
+def check_size(upload):
+    if upload.size > IMAGE_MAX_UPLOAD_SIZE:
+        raise ValidationError(
+            'Файл больше %(limit)s',
+            code='file_too_large',
+            params={'limit': filesizeformat(IMAGE_MAX_UPLOAD_SIZE)},
+        )
+
+
+def prepare_image(upload):
+    """Уменьшенная копия без метаданных с тем же именем и форматом."""
+    check_size(upload)
+    upload.seek(0)
+    image = Image.open(upload)
+    width, height = image.size
+    # Проверка до декодирования: open() читает только заголовок.
+    max_pixels = (
+        IMAGE_MAX_PIXELS if image.format == 'JPEG'
+        else IMAGE_MAX_DECODED_PIXELS
+    )
+    if width * height > max_pixels:
+        raise ValidationError(
+            'Слишком большое разрешение картинки', code='too_many_pixels'
+        )
+    options = REENCODED.get(image.format)
+    if options is None:
+        upload.seek(0)
+        return upload
+    image_format = image.format
+    image.draft('RGB', (IMAGE_MAX_SIDE, IMAGE_MAX_SIDE))
+    image = ImageOps.exif_transpose(image)
+    image.thumbnail((IMAGE_MAX_SIDE, IMAGE_MAX_SIDE), Image.LANCZOS)
+    if image_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+    output = tempfile.SpooledTemporaryFile(max_size=IMAGE_SPOOL_SIZE)
+    # info не передаётся в save: EXIF, ICC и комментарии не сохраняются.
+    image.save(output, image_format, **options)
+    size = output.tell()
+    output.seek(0)
+    return UploadedFile(
+        output,
+        name=upload.name,
+        content_type=upload.content_type,
+        size=size,
+    )
+
+
+def clean_image(image):
+    """Новая загрузка - готовится, уже сохранённый файл - как есть."""
+    if isinstance(image, UploadedFile):
+        return prepare_image(image)
+    return image
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from posts import suggestions
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересобирает рекомендации «Кого читать» по подпискам и общим '
+        'лайкам; запускается периодически, например из cron'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        total = suggestions.build(options['batch_size'])
+        self.stdout.write(f'Рекомендаций: {total}')
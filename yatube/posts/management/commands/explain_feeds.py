@@ -0,0 +1,83 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from posts.models import Comment, Follow, Group, Post, User
+from posts.settings import PAGINATOR_LIMIT
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Показывает планы и время запросов лент; с --compare то же самое '
+        'без составных индексов (индексы удаляются внутри отменяемой '
+        'транзакции)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--compare', action='store_true')
+
+    def feed_queries(self):
+        author = User.objects.filter(posts__isnull=False).first()
+        group = Group.objects.filter(posts__isnull=False).first()
+        post = Post.objects.filter(comments__isnull=False).first()
+        if not (author and group and post):
+            raise CommandError('Нужны посты с группой и комментариями')
+        return {
+            'index': Post.objects.order_by('-pub_date', '-id'),
+            'group_posts': group.posts.all(),
+            'profile': author.posts.all(),
+            'post_detail comments': post.comments.all(),
+            'author followers': Follow.objects.filter(author=author),
+        }
+
+    def explain(self, queryset, title):
+        sql, params = queryset[:PAGINATOR_LIMIT].query.sql_with_params()
+        prefix = (
+            'EXPLAIN QUERY PLAN' if connection.vendor == 'sqlite'
+            else 'EXPLAIN'
+        )
+        with connection.cursor() as cursor:
+            # Комментарий делает текст запроса новым: иначе sqlite3 вернёт
+            # план из кеша подготовленных выражений, снятый до DROP INDEX.
+            cursor.execute(f'{prefix} {sql} /* {title} */', params)
+            return [str(row[-1]) for row in cursor.fetchall()]
+
+    def timing(self, queryset, repeat):
+        runs = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            list(queryset[:PAGINATOR_LIMIT])
+            runs.append(time.perf_counter() - start)
+        return statistics.median(runs) * 1000
+
+    def report(self, title, repeat):
+        self.stdout.write(self.style.MIGRATE_HEADING(title))
+        for name, queryset in self.feed_queries().items():
+            self.stdout.write(
+                f'{name}: {self.timing(queryset, repeat):.3f} мс'
+            )
+            for line in self.explain(queryset, title):
+                self.stdout.write(f'    {line}')
+
+    def handle(self, *args, **options):
+        self.report('С индексами', options['repeat'])
+        if not options['compare']:
+            return
+        try:
+            with transaction.atomic(), connection.cursor() as cursor:
+                for model in (Post, Comment, Follow):
+                    for index in model._meta.indexes:
+                        cursor.execute('DROP INDEX {}'.format(
+                            connection.ops.quote_name(index.name)
+                        ))
+                self.report('Без индексов', options['repeat'])
+                raise Rollback
+        except Rollback:
+            pass
@@ -0,0 +1,75 @@
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.transfer import KINDS, encode, header
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает пользователей, группы, посты, комментарии, подписки '
+        'и лайки в JSONL пачками по первичному ключу'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help='Файл выгрузки')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help='Продолжить с контрольной точки прерванной выгрузки',
+        )
+
+    def read_checkpoint(self, path):
+        try:
+            with open(path) as checkpoint:
+                return json.load(checkpoint)
+        except FileNotFoundError:
+            raise CommandError(f'Нет контрольной точки {path}')
+
+    def write_checkpoint(self, path, state):
+        with open(f'{path}.tmp', 'w') as checkpoint:
+            json.dump(state, checkpoint)
+        os.replace(f'{path}.tmp', path)
+
+    def handle(self, *args, **options):
+        output = options['output']
+        checkpoint = f'{output}.checkpoint'
+        state = None
+        if options['resume']:
+            state = self.read_checkpoint(checkpoint)
+        names = list(KINDS)
+        with open(output, 'r+b' if state else 'wb') as out:
+            if state:
+                out.truncate(state['offset'])
+                out.seek(state['offset'])
+                names = names[names.index(state['kind']):]
+            else:
+                out.write(encode(header()))
+            last_pk = state and state['last_pk']
+            for name in names:
+                kind = KINDS[name]
+                exported = 0
+                while True:
+                    queryset = kind.queryset()
+                    if last_pk is not None:
+                        queryset = queryset.filter(pk__gt=last_pk)
+                    rows = list(
+                        queryset[:options['batch_size']].iterator()
+                    )
+                    if not rows:
+                        break
+                    out.write(b''.join(
+                        encode(kind.to_record(row)) for row in rows
+                    ))
+                    out.flush()
+                    last_pk = rows[-1]['pk']
+                    exported += len(rows)
+                    self.write_checkpoint(checkpoint, {
+                        'kind': name, 'last_pk': last_pk, 'offset': out.tell()
+                    })
+                last_pk = None
+                self.stdout.write(f'{name}: {exported}')
+        if os.path.exists(checkpoint):
+            os.remove(checkpoint)
@@ -0,0 +1,42 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.utils import timezone
+
+from posts import feed_cache
+from posts.models import Post
+from posts.thumbnails import generate_thumbnails
+
+
+class Command(BaseCommand):
+    help = 'Нарезает миниатюры картинок всех постов в несколько процессов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes', type=int, default=os.cpu_count() or 1
+        )
+        parser.add_argument('--chunk-size', type=int, default=20)
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image='')
+        names = list(posts.values_list('image', flat=True))
+        # Дочерние процессы не должны наследовать открытые соединения.
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=options['processes']) as pool:
+            for done, _ in enumerate(pool.map(
+                generate_thumbnails,
+                names,
+                chunksize=options['chunk_size'],
+            ), 1):
+                if done % 100 == 0:
+                    self.stdout.write(f'Обработано картинок: {done}')
+        # Карточки кешируются по post.modified: без сдвига в них осталась
+        # бы прежняя миниатюра или оригинал картинки.
+        posts.update(modified=timezone.now())
+        feed_cache.bump(*{
+            feed for post in posts.only('author', 'group').iterator()
+            for feed in feed_cache.post_feeds(post)
+        })
+        self.stdout.write(f'Готово, картинок: {len(names)}')
@@ -0,0 +1,163 @@
+import json
+import os
+
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+
+from posts import feed_cache, timeline
+from posts.models import Comment, Group, Post, User
+from posts.stats import invalidate_author_stats
+from posts.transfer import FORMAT, KINDS, REFERENCED, VERSION, decode
+
+# Сколько ключей конфликтующих записей показать в отчёте.
+CONFLICT_SAMPLES = 5
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает выгрузку export_yatube пачками bulk_create, '
+        'каждая пачка - в своей транзакции'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('input', help='Файл выгрузки')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help='Продолжить с контрольной точки прерванной загрузки',
+        )
+        parser.add_argument(
+            '--check-media',
+            action='store_true',
+            help='Проверить, что картинки постов есть в хранилище медиа',
+        )
+
+    def read_header(self, source):
+        head = decode(source.readline() or '{}')
+        if head.get('format') != FORMAT or head.get('version') != VERSION:
+            raise CommandError('Файл не является выгрузкой export_yatube')
+
+    def load(self, name, records, offset, checkpoint):
+        kind = KINDS[name]
+        with transaction.atomic():
+            objects, conflicts, orphans = kind.load(records, self.skipped)
+        if name in REFERENCED:
+            self.skipped.setdefault(name, set()).update(conflicts)
+        # Пропущенные ключи - в контрольной точке: на них могут ссылаться
+        # записи после сбоя.
+        with open(f'{checkpoint}.tmp', 'w') as state:
+            json.dump({'offset': offset, 'skipped': {
+                kind_name: sorted(keys)
+                for kind_name, keys in self.skipped.items()
+            }}, state)
+        os.replace(f'{checkpoint}.tmp', checkpoint)
+        self.counts[name] = self.counts.get(name, 0) + len(objects)
+        self.feeds.update(kind.feeds(objects))
+        self.authors.update(kind.authors(objects))
+        self.note(self.conflicts, name, conflicts)
+        self.note(self.orphans, name, orphans)
+
+    def note(self, skipped, name, keys):
+        """Учитывает пропущенные записи пачки: число и примеры ключей."""
+        if keys:
+            total = skipped.setdefault(name, [0, []])
+            total[0] += len(keys)
+            total[1] += sorted(keys)[:CONFLICT_SAMPLES - len(total[1])]
+
+    def refresh(self, resumed):
+        """Один раз то, что при обычном save() делают сигналы."""
+        timeline.rebuild()
+        if resumed:
+            # Пачки до сбоя не записаны в self.feeds: сдвигаем всё.
+            self.feeds.update(feed_cache.group_feed(pk) for pk in (
+                Group.objects.values_list('pk', flat=True).iterator()
+            ))
+            self.authors.update(
+                User.objects.values_list('pk', flat=True).iterator()
+            )
+        self.feeds.update(
+            feed_cache.author_feed(author_id) for author_id in self.authors
+        )
+        self.feeds.add(feed_cache.GLOBAL_FEED)
+        feed_cache.bump(*self.feeds)
+        invalidate_author_stats(*self.authors)
+
+    def report(self):
+        for name, count in self.counts.items():
+            self.stdout.write(f'{name}: {count}')
+        for skipped, reason in (
+            (self.conflicts, 'уже есть в базе'),
+            (self.orphans, 'ссылается на пропущенные записи'),
+        ):
+            for name, (count, samples) in skipped.items():
+                samples = ', '.join(
+                    '/'.join(map(str, key)) for key in samples
+                )
+                self.stdout.write(self.style.WARNING(
+                    f'{name}: {count} {reason} и пропущено, '
+                    f'например {samples}'
+                ))
+
+    def handle(self, *args, **options):
+        checkpoint = f"{options['input']}.checkpoint"
+        batch_size = options['batch_size']
+        self.counts = {}
+        self.conflicts = {}
+        self.orphans = {}
+        self.skipped = {}
+        self.feeds = set()
+        self.authors = set()
+        with open(options['input'], 'rb') as source:
+            self.read_header(source)
+            if options['resume']:
+                try:
+                    with open(checkpoint) as file:
+                        state = json.load(file)
+                    source.seek(state['offset'])
+                    self.skipped = {
+                        name: set(map(tuple, keys))
+                        for name, keys in state.get('skipped', {}).items()
+                    }
+                except FileNotFoundError:
+                    raise CommandError(f'Нет контрольной точки {checkpoint}')
+            name, records = None, []
+            offset = source.tell()
+            for line in iter(source.readline, b''):
+                record = decode(line)
+                if records and (
+                    record['kind'] != name or len(records) == batch_size
+                ):
+                    self.load(name, records, offset, checkpoint)
+                    records = []
+                name = record.pop('kind')
+                if name not in KINDS:
+                    raise CommandError(f'Неизвестный вид записи: {name}')
+                records.append(record)
+                offset = source.tell()
+            if records:
+                self.load(name, records, offset, checkpoint)
+        # Явные ключи не сдвигают последовательности (кроме SQLite).
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(
+                no_style(), [Post, Comment]
+            ):
+                cursor.execute(sql)
+        call_command('recount_post_counters', stdout=self.stdout)
+        # Лайки и комментарии загружены bulk_create, мимо событий.
+        call_command('update_trending', rebuild=True, stdout=self.stdout)
+        self.refresh(options['resume'])
+        self.report()
+        if options['check_media']:
+            missing = sum(
+                not default_storage.exists(image)
+                for image in Post.objects.exclude(image='').values_list(
+                    'image', flat=True
+                ).iterator()
+            )
+            self.stdout.write(f'Картинок нет в хранилище: {missing}')
+        if os.path.exists(checkpoint):
+            os.remove(checkpoint)
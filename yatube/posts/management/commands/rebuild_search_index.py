@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from posts import search
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересобирает полнотекстовый индекс постов порциями в одной '
+        'транзакции: до фиксации поиск видит старый индекс целиком'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        if not search.is_supported():
+            raise CommandError('Поиск по постам работает только на SQLite')
+        table = search.FTS_TABLE
+        last_pk = 0
+        indexed = 0
+        # Сбой откатывает и очистку: индекс не остаётся пустым или
+        # заполненным наполовину, повторный запуск не дублирует посты.
+        with transaction.atomic(), connection.cursor() as cursor:
+            search.install(cursor)
+            cursor.execute(
+                f"INSERT INTO {table}({table}) VALUES ('delete-all')"
+            )
+            while True:
+                cursor.execute(
+                    'SELECT max(id) FROM (SELECT id FROM posts_post '
+                    'WHERE id > %s ORDER BY id LIMIT %s)',
+                    [last_pk, options['batch_size']],
+                )
+                batch_end = cursor.fetchone()[0]
+                if batch_end is None:
+                    break
+                cursor.execute(
+                    f'INSERT INTO {table}(rowid, text) '
+                    'SELECT id, text FROM posts_post '
+                    'WHERE id > %s AND id <= %s',
+                    [last_pk, batch_end],
+                )
+                indexed += cursor.rowcount
+                last_pk = batch_end
+                self.stdout.write(f'Проиндексировано постов: {indexed}')
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {table}({table}) VALUES ('optimize')")
+        self.stdout.write('Индекс пересобран')
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import F, Max
+
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает или проверяет счётчики лайков и комментариев'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Только найти посты с неверными счётчиками',
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        last_pk = Post.objects.aggregate(last=Max('pk'))['last'] or 0
+        broken = 0
+        for start in range(0, last_pk + 1, batch_size):
+            batch = Post.objects.filter(
+                pk__gte=start, pk__lt=start + batch_size
+            )
+            with transaction.atomic():
+                stale = batch.with_actual_counts().exclude(
+                    likes_count=F('actual_likes_count'),
+                    comments_count=F('actual_comments_count'),
+                ).values_list('pk', flat=True)
+                if options['check']:
+                    broken += stale.count()
+                else:
+                    broken += Post.objects.filter(
+                        pk__in=list(stale)
+                    ).recount()
+        if not options['check']:
+            self.stdout.write(f'Исправлено постов: {broken}')
+        elif broken:
+            raise CommandError(f'Неверные счётчики у постов: {broken}')
+        else:
+            self.stdout.write('Счётчики в порядке')
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from posts import trending
+from posts.models import Trending
+from posts.settings import TRENDING_DECAY_INTERVAL
+
+
+class Command(BaseCommand):
+    help = (
+        'Состаривает счета популярных постов; запускается раз в '
+        f'{TRENDING_DECAY_INTERVAL} с, например из cron. С --rebuild '
+        'пересчитывает таблицу с нуля'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true')
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            trending.rebuild()
+        else:
+            trending.decay()
+        self.stdout.write(f'Популярных постов: {Trending.objects.count()}')
@@ -0,0 +1,45 @@
+# Generated by Django 2.2.16 on 2026-10-18 18:46
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def fill_counters(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    Comment = apps.get_model('posts', 'Comment')
+
+    def count(queryset):
+        return Coalesce(models.Subquery(
+            queryset.order_by().values('post').annotate(
+                total=models.Count('pk')
+            ).values('total')[:1],
+            output_field=models.IntegerField(),
+        ), 0)
+
+    Post.objects.update(
+        likes_count=count(Post.likes.through.objects.filter(
+            post=models.OuterRef('pk'))),
+        comments_count=count(Comment.objects.filter(
+            post=models.OuterRef('pk'))),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0007_auto_20220525_2313'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='comments_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Число комментариев'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='likes_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Число лайков'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
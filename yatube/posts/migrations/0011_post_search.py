@@ -0,0 +1,65 @@
+from django.db import migrations
+
+# SQL на момент миграции, а не из posts.search: модуль может меняться.
+TRIGGERS_SQL = (
+    """CREATE TRIGGER IF NOT EXISTS posts_post_fts_insert
+        AFTER INSERT ON posts_post BEGIN
+            INSERT INTO posts_post_fts(rowid, text) VALUES (new.id, new.text);
+        END""",
+    """CREATE TRIGGER IF NOT EXISTS posts_post_fts_delete
+        AFTER DELETE ON posts_post BEGIN
+            INSERT INTO posts_post_fts(posts_post_fts, rowid, text)
+            VALUES ('delete', old.id, old.text);
+        END""",
+    """CREATE TRIGGER IF NOT EXISTS posts_post_fts_update
+        AFTER UPDATE OF text ON posts_post BEGIN
+            INSERT INTO posts_post_fts(posts_post_fts, rowid, text)
+            VALUES ('delete', old.id, old.text);
+            INSERT INTO posts_post_fts(rowid, text) VALUES (new.id, new.text);
+        END""",
+)
+
+INSTALL_SQL = (
+    """CREATE VIRTUAL TABLE IF NOT EXISTS posts_post_fts USING fts5(
+        text,
+        content='posts_post',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    *TRIGGERS_SQL,
+    "INSERT INTO posts_post_fts(posts_post_fts) VALUES ('rebuild')",
+)
+
+UNINSTALL_SQL = (
+    'DROP TRIGGER IF EXISTS posts_post_fts_insert',
+    'DROP TRIGGER IF EXISTS posts_post_fts_delete',
+    'DROP TRIGGER IF EXISTS posts_post_fts_update',
+    'DROP TABLE IF EXISTS posts_post_fts',
+)
+
+
+def execute(schema_editor, statements):
+    # FTS5 есть только в SQLite; на других базах поиск идёт по icontains.
+    if schema_editor.connection.vendor == 'sqlite':
+        with schema_editor.connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+
+
+def install_search(apps, schema_editor):
+    execute(schema_editor, INSTALL_SQL)
+
+
+def uninstall_search(apps, schema_editor):
+    execute(schema_editor, UNINSTALL_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0010_post_modified'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_search, uninstall_search),
+    ]
@@ -0,0 +1,80 @@
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+import django.utils.timezone
+
+# Порог на момент миграции: раньше он проверялся при каждом чтении ленты.
+FANOUT_LIMIT = 1000
+
+# Триггеры поиска на момент миграции, как в 0011_post_search.
+TRIGGERS_SQL = (
+    """CREATE TRIGGER IF NOT EXISTS posts_post_fts_insert
+        AFTER INSERT ON posts_post BEGIN
+            INSERT INTO posts_post_fts(rowid, text) VALUES (new.id, new.text);
+        END""",
+    """CREATE TRIGGER IF NOT EXISTS posts_post_fts_delete
+        AFTER DELETE ON posts_post BEGIN
+            INSERT INTO posts_post_fts(posts_post_fts, rowid, text)
+            VALUES ('delete', old.id, old.text);
+        END""",
+    """CREATE TRIGGER IF NOT EXISTS posts_post_fts_update
+        AFTER UPDATE OF text ON posts_post BEGIN
+            INSERT INTO posts_post_fts(posts_post_fts, rowid, text)
+            VALUES ('delete', old.id, old.text);
+            INSERT INTO posts_post_fts(rowid, text) VALUES (new.id, new.text);
+        END""",
+)
+
+
+def split_timelines(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    TimelineEntry = apps.get_model('posts', 'TimelineEntry')
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    TimelineEntry.objects.update(pub_date=Subquery(
+        Post.objects.filter(pk=OuterRef('post')).values('pub_date')[:1]
+    ))
+    large_authors = User.objects.annotate(
+        followers=Count('following')
+    ).filter(followers__gt=FANOUT_LIMIT).values('pk')
+    Post.objects.filter(author__in=large_authors).update(fanned_out=False)
+    TimelineEntry.objects.filter(post__fanned_out=False).delete()
+
+
+def reinstall_search(apps, schema_editor):
+    # AddField пересобирает posts_post на SQLite, триггеры поиска теряются.
+    if schema_editor.connection.vendor == 'sqlite':
+        with schema_editor.connection.cursor() as cursor:
+            for sql in TRIGGERS_SQL:
+                cursor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0014_trending'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='fanned_out',
+            field=models.BooleanField(default=True, editable=False, verbose_name='Разложен по лентам подписчиков'),
+        ),
+        migrations.AddField(
+            model_name='timelineentry',
+            name='pub_date',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='Дата публикации'),
+            preserve_default=False,
+        ),
+        migrations.RunPython(reinstall_search, migrations.RunPython.noop),
+        migrations.RunPython(split_timelines, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(fanned_out=False), fields=['-pub_date', '-id'], name='post_pulled_pub_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='timelineentry',
+            index=models.Index(fields=['user', '-pub_date', '-post'], name='timeline_user_pub_date_idx'),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.db.models.functions import Coalesce
 
 from .settings import LIMIT_STR_TEXT
 
@@ -19,6 +20,42 @@ class Group(models.Model):
         verbose_name_plural = 'Группы'
 
 
+def count_subquery(queryset, field='post'):
+    """COUNT(*) связанных строк, сгруппированных по полю field."""
+    return Coalesce(models.Subquery(
+        queryset.order_by().values(field).annotate(
+            total=models.Count('pk')
+        ).values('total')[:1],
+        output_field=models.IntegerField(),
+    ), 0)
+
+
+def actual_counters():
+    """Счётчики поста, посчитанные по таблицам лайков и комментариев."""
+    return {
+        'likes_count': count_subquery(Post.likes.through.objects.filter(
+            post=models.OuterRef('pk'))),
+        'comments_count': count_subquery(Comment.objects.filter(
+            post=models.OuterRef('pk'))),
+    }
+
+
+class PostQuerySet(models.QuerySet):
+    def for_feed(self):
+        """Автор и группа карточки поста тем же запросом."""
+        return self.select_related('author', 'group')
+
+    def with_actual_counts(self):
+        return self.annotate(**{
+            f'actual_{name}': counter
+            for name, counter in actual_counters().items()
+        })
+
+    def recount(self):
+        """Пересчитывает сохранённые счётчики одним UPDATE."""
+        return self.update(**actual_counters())
+
+
 class Post(models.Model):
     DISPLAY = (
         '{text:.{LIMIT_STR_TEXT}}, '
@@ -30,6 +67,10 @@ class Post(models.Model):
         auto_now_add=True,
         verbose_name='Дата публикации'
     )
+    modified = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Дата изменения'
+    )
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -55,6 +96,23 @@ class Post(models.Model):
         related_name='likes',
         verbose_name='Лайк'
     )
+    likes_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Число лайков'
+    )
+    comments_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Число комментариев'
+    )
+    fanned_out = models.BooleanField(
+        default=True,
+        editable=False,
+        verbose_name='Разложен по лентам подписчиков'
+    )
+
+    objects = PostQuerySet.as_manager()
 
     def __str__(self):
         return (self.DISPLAY.format(
@@ -68,6 +126,21 @@ class Post(models.Model):
         ordering = ('-pub_date',)
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
+        indexes = [
+            models.Index(
+                fields=['author', '-pub_date'], name='post_author_pub_date_idx'
+            ),
+            models.Index(
+                fields=['group', '-pub_date'], name='post_group_pub_date_idx'
+            ),
+            models.Index(
+                fields=['-pub_date', '-id'], name='post_pub_date_idx'
+            ),
+            models.Index(
+                fields=['-pub_date', '-id'], name='post_pulled_pub_date_idx',
+                condition=models.Q(fanned_out=False),
+            ),
+        ]
 
 
 class Comment(models.Model):
@@ -104,6 +177,11 @@ class Comment(models.Model):
         ordering = ('-created',)
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = [
+            models.Index(
+                fields=['post', '-created'], name='comment_post_created_idx'
+            ),
+        ]
 
 
 class Follow(models.Model):
@@ -123,7 +201,94 @@ class Follow(models.Model):
     class Meta:
         verbose_name = 'Подписка'
         verbose_name_plural = 'Подписки'
+        indexes = [
+            models.Index(
+                fields=['author', 'user'], name='follow_author_user_idx'
+            ),
+        ]
         constraints = [models.UniqueConstraint(
             fields=['user', 'author'],
             name='unique_follow')
         ]
+
+
+class TimelineEntry(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Читатель',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Пост',
+    )
+    # Копия Post.pub_date: лента листается без JOIN с постами.
+    pub_date = models.DateTimeField(verbose_name='Дата публикации')
+
+    class Meta:
+        verbose_name = 'Запись ленты подписок'
+        verbose_name_plural = 'Записи ленты подписок'
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-post'],
+                name='timeline_user_pub_date_idx',
+            ),
+        ]
+        constraints = [models.UniqueConstraint(
+            fields=['user', 'post'],
+            name='unique_timeline_entry')
+        ]
+
+
+class Suggestion(models.Model):
+    """Кого читать: заранее посчитанные кандидаты для пользователя."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='suggestions',
+        verbose_name='Читатель',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор',
+    )
+    score = models.FloatField(verbose_name='Вес')
+
+    class Meta:
+        verbose_name = 'Рекомендация'
+        verbose_name_plural = 'Рекомендации'
+        indexes = [
+            models.Index(
+                fields=['user', '-score'], name='suggestion_user_score_idx'
+            ),
+        ]
+        constraints = [models.UniqueConstraint(
+            fields=['user', 'author'],
+            name='unique_suggestion')
+        ]
+
+
+class Trending(models.Model):
+    """Популярные посты: счёт с затуханием, только для небольшой верхушки."""
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='trending',
+        verbose_name='Пост',
+    )
+    score = models.FloatField(default=0, verbose_name='Счёт')
+
+    class Meta:
+        verbose_name = 'Популярный пост'
+        verbose_name_plural = 'Популярные посты'
+        indexes = [
+            models.Index(
+                fields=['-score', '-post'], name='trending_score_idx'
+            ),
+        ]
@@ -0,0 +1,148 @@
+import base64
+import binascii
+import datetime
+import json
+import math
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.paginator import Page, Paginator
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+NEXT = 'n'
+PREVIOUS = 'p'
+
+
+def finite_float(value):
+    """Числовое значение курсора для ключа-аннотации, не поля модели."""
+    number = float(value)
+    if not math.isfinite(number):
+        raise ValueError(value)
+    return number
+
+
+def is_key_value(value):
+    """Значение ключа в курсоре: строка или конечное число, не null."""
+    if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+        return False
+    return not isinstance(value, float) or math.isfinite(value)
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """Сохраняет микросекунды: без них ключ сравнивался бы неточно."""
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+class CursorPage(Page):
+    """Страница ключевой пагинации: знает только соседние курсоры."""
+
+    def __init__(self, object_list, paginator, next_cursor, previous_cursor):
+        super().__init__(
+            object_list, None if previous_cursor else 1, paginator
+        )
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f'<Cursor page of {len(self.object_list)} objects>'
+
+    def has_next(self):
+        return bool(self.next_cursor)
+
+    def has_previous(self):
+        return bool(self.previous_cursor)
+
+
+class CursorPaginator(Paginator):
+    """Пагинация по ключу (pub_date, id) без COUNT(*) и OFFSET.
+
+    Стоимость любой страницы одинакова: диапазонный запрос по ключу
+    сортировки плюс одна лишняя строка, чтобы понять, есть ли продолжение.
+    """
+
+    def __init__(self, object_list, per_page,
+                 ordering=('-pub_date', '-id')):
+        super().__init__(object_list.order_by(*ordering), per_page)
+        self.ordering = ordering
+        self.fields = [field.lstrip('-') for field in ordering]
+        self.descending = ordering[0].startswith('-')
+
+    def encode_cursor(self, direction, obj):
+        if isinstance(obj, dict):
+            values = [obj[field] for field in self.fields]
+        else:
+            values = [getattr(obj, field) for field in self.fields]
+        return base64.urlsafe_b64encode(
+            json.dumps([direction, values], cls=CursorEncoder).encode()
+        ).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            direction, values = json.loads(base64.urlsafe_b64decode(
+                cursor + '=' * (-len(cursor) % 4)
+            ))
+            if direction not in (NEXT, PREVIOUS):
+                raise ValueError
+            if not isinstance(values, list) or not all(
+                map(is_key_value, values)
+            ):
+                raise ValueError
+            values = [
+                self.to_python(field, value)
+                for field, value in zip(self.fields, values)
+            ]
+        except (
+            TypeError, ValueError, OverflowError, binascii.Error,
+            ValidationError,
+        ):
+            return None, None
+        if len(values) != len(self.fields):
+            return None, None
+        return direction, values
+
+    def to_python(self, field, value):
+        try:
+            model_field = self.object_list.model._meta.get_field(field)
+        except FieldDoesNotExist:
+            return value
+        return model_field.to_python(value)
+
+    def seek(self, queryset, values, after):
+        """Строки строго после/до ключа в порядке сортировки."""
+        lookup = 'lt' if self.descending == after else 'gt'
+        condition = Q()
+        for position, field in enumerate(self.fields):
+            step = Q(**{f'{field}__{lookup}': values[position]})
+            for previous, value in zip(self.fields, values[:position]):
+                step &= Q(**{previous: value})
+            condition |= step
+        return queryset.filter(condition)
+
+    def get_page(self, cursor=None):
+        direction, values = self.decode_cursor(cursor or '')
+        queryset = self.object_list
+        if direction == PREVIOUS:
+            queryset = self.seek(queryset, values, after=False).reverse()
+        elif direction == NEXT:
+            queryset = self.seek(queryset, values, after=True)
+        objects = list(queryset[:self.per_page + 1])
+        has_more = len(objects) > self.per_page
+        objects = objects[:self.per_page]
+        if direction == PREVIOUS:
+            objects.reverse()
+        if not objects:
+            return CursorPage(objects, self, None, None)
+        has_next = has_more if direction != PREVIOUS else True
+        has_previous = direction == NEXT or (
+            direction == PREVIOUS and has_more
+        )
+        return CursorPage(
+            objects,
+            self,
+            has_next and self.encode_cursor(NEXT, objects[-1]) or None,
+            has_previous and self.encode_cursor(PREVIOUS, objects[0]) or None,
+        )
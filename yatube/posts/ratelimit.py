@@ -0,0 +1,71 @@
+"""Ограничение частоты запросов на запись: ведро токенов в общем кеше.
+
+Лимиты задаются по имени URL в RATE_LIMITS. Ведро хранится одним числом -
+теоретическим временем прихода следующего запроса (GCRA): это то же ведро
+на N токенов с пополнением N за период, но без фонового пополнения и
+без второго ключа. Проверка - один get и один set в кеше. Одновременные
+запросы одного пользователя могут проскочить оба: лимит защищает от
+потока спама, а не от пары лишних запросов. Гостей различаем по адресу
+из core.ip: за прокси у всех один REMOTE_ADDR.
+"""
+import math
+import time
+
+from django.core.cache import cache
+from django.http import JsonResponse
+from django.shortcuts import render
+
+from core.ip import client_ip
+
+from .settings import RATE_LIMITS
+
+
+def bucket_key(request, view_name):
+    if request.user.is_authenticated:
+        return f'ratelimit:{view_name}:user:{request.user.pk}'
+    return f'ratelimit:{view_name}:ip:{client_ip(request)}'
+
+
+def take(key, requests, period):
+    """Берёт токен; 0 - запрос пропущен, иначе секунды до нового токена."""
+    now = time.time()
+    interval = period / requests
+    arrival = max(cache.get(key, now), now) + interval
+    if arrival - now > period:
+        return arrival - now - period
+    cache.set(key, arrival, timeout=math.ceil(arrival - now))
+    return 0
+
+
+def too_many_requests(request, retry_after):
+    seconds = math.ceil(retry_after)
+    if request.is_ajax():
+        response = JsonResponse(
+            {'detail': 'Слишком много запросов'}, status=429
+        )
+    else:
+        response = render(
+            request, 'core/429.html', {'retry_after': seconds}, status=429
+        )
+    response['Retry-After'] = str(seconds)
+    return response
+
+
+class RateLimitMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_name = request.resolver_match.view_name
+        if view_name not in RATE_LIMITS:
+            return None
+        requests, period, methods = RATE_LIMITS[view_name]
+        if request.method not in methods:
+            return None
+        retry_after = take(bucket_key(request, view_name), requests, period)
+        if retry_after:
+            return too_many_requests(request, retry_after)
+        return None
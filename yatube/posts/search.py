@@ -0,0 +1,120 @@
+"""Полнотекстовый поиск по постам на SQLite FTS5.
+
+Таблица posts_post_fts хранит только индекс по внешнему содержимому
+posts_post и обновляется триггерами, поэтому синхронна даже для
+bulk_create и update(). Пересборка таблицы posts_post миграцией SQLite
+удаляет триггеры: их восстанавливает команда rebuild_search_index.
+"""
+import re
+
+from django.db import connection
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import Post
+from .paginator import CursorPaginator, finite_float
+
+FTS_TABLE = 'posts_post_fts'
+MARK_START = '\x02'
+MARK_END = '\x03'
+SNIPPET_TOKENS = 16
+
+INSTALL_SQL = (
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        text,
+        content='posts_post',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_insert
+        AFTER INSERT ON posts_post BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text);
+        END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_delete
+        AFTER DELETE ON posts_post BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text)
+            VALUES ('delete', old.id, old.text);
+        END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_update
+        AFTER UPDATE OF text ON posts_post BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text)
+            VALUES ('delete', old.id, old.text);
+            INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text);
+        END""",
+)
+
+
+def is_supported(using=connection):
+    return using.vendor == 'sqlite'
+
+
+def install(cursor):
+    for sql in INSTALL_SQL:
+        cursor.execute(sql)
+
+
+def match_expression(query):
+    """Слова запроса в кавычках: пользователь не пишет синтаксис FTS5."""
+    return ' '.join(f'"{word}"' for word in re.findall(r'\w+', query))
+
+
+class SearchPaginator(CursorPaginator):
+    """Курсор по (rank, id): rank — выражение bm25, а не поле модели."""
+
+    def __init__(self, object_list, per_page):
+        super().__init__(object_list, per_page, ordering=('rank', 'id'))
+
+    def to_python(self, field, value):
+        # rank попадает в extra() как есть: строка сравнивалась бы как текст.
+        if field == 'rank':
+            return finite_float(value)
+        return super().to_python(field, value)
+
+    def seek(self, queryset, values, after):
+        rank, pk = values
+        sign = '>' if after else '<'
+        return queryset.extra(
+            where=[
+                f'(bm25({FTS_TABLE}) {sign} %s OR '
+                f'(bm25({FTS_TABLE}) = %s AND posts_post.id {sign} %s))'
+            ],
+            params=[rank, rank, pk],
+        )
+
+
+def search_posts(match):
+    """Посты под выражение FTS5 с рангом bm25 и сниппетом."""
+    return Post.objects.for_feed().extra(
+        select={
+            'rank': f'bm25({FTS_TABLE})',
+            'snippet': (
+                f'snippet({FTS_TABLE}, 0, %s, %s, %s, {SNIPPET_TOKENS})'
+            ),
+        },
+        select_params=(MARK_START, MARK_END, '…'),
+        tables=[FTS_TABLE],
+        where=[f'{FTS_TABLE}.rowid = posts_post.id', f'{FTS_TABLE} MATCH %s'],
+        params=[match],
+    )
+
+
+def highlight(snippet):
+    return mark_safe(
+        escape(snippet)
+        .replace(MARK_START, '<mark>')
+        .replace(MARK_END, '</mark>')
+    )
+
+
+def get_search_page(query, per_page, cursor=None):
+    match = match_expression(query)
+    if not match:
+        return CursorPaginator(Post.objects.none(), per_page).get_page()
+    if not is_supported():
+        return CursorPaginator(
+            Post.objects.for_feed().filter(text__icontains=query), per_page
+        ).get_page(cursor)
+    page = SearchPaginator(search_posts(match), per_page).get_page(cursor)
+    for post in page:
+        post.highlighted = highlight(post.snippet)
+    return page
@@ -2,4 +2,73 @@ LIMIT_STR_TEXT = 15
 
 PAGINATOR_LIMIT = 10
 
-CACHE_IN_S = 1
+COMMENTS_LIMIT = 20
+
+API_PAGE_LIMIT = 20
+
+FEED_CACHE_TIMEOUT = 300
+
+SYNDICATION_LIMIT = 20
+
+SYNDICATION_TITLE_WORDS = 10
+
+POST_CARD_CACHE_TIMEOUT = 60 * 60
+
+CURSOR_PAGINATION = False
+
+TIMELINE_FANOUT_LIMIT = 1000
+
+TIMELINE_BATCH_SIZE = 1000
+
+AUTHOR_STATS_CACHE_TIMEOUT = 60 * 60
+
+SUGGESTIONS_LIMIT = 20
+
+SUGGESTIONS_SHOWN = 5
+
+SUGGESTION_LIKE_WEIGHT = 0.5
+
+TRENDING_LIKE_WEIGHT = 1
+
+TRENDING_COMMENT_WEIGHT = 2
+
+TRENDING_HALF_LIFE = 24 * 60 * 60
+
+TRENDING_DECAY_INTERVAL = 60 * 60
+
+TRENDING_MIN_SCORE = 0.1
+
+TRENDING_SIZE = 500
+
+POST_THUMBNAILS = (
+    ('1280x720', {'crop': 'center', 'padding': True, 'upscale': True}),
+    ('1280x720', {'crop': 'center', 'upscale': True}),
+)
+
+THUMBNAIL_WORKERS = 2
+
+IMAGE_MAX_UPLOAD_SIZE = 20 * 1024 * 1024
+
+IMAGE_MAX_PIXELS = 60_000_000
+
+# Для форматов, которые draft() не уменьшает при декодировании: кадр
+# декодируется целиком, до 64 МБ в RGBA.
+IMAGE_MAX_DECODED_PIXELS = 16_000_000
+
+IMAGE_MAX_SIDE = 2560
+
+IMAGE_JPEG_QUALITY = 85
+
+IMAGE_SPOOL_SIZE = 1024 * 1024
+
+VIEW_QUERY_WORKERS = 4
+
+# Имя URL: (запросов, за секунд, методы). Ведро на пользователя, для
+# гостей - на IP-адрес; profile_follow подписывает и по GET.
+RATE_LIMITS = {
+    'posts:post_create': (10, 10 * 60, ('POST',)),
+    'posts:add_comment': (20, 5 * 60, ('POST',)),
+    'posts:like': (60, 60, ('POST',)),
+    'posts:profile_follow': (30, 5 * 60, ('GET', 'POST')),
+    'users:signup': (5, 60 * 60, ('POST',)),
+}
@@ -0,0 +1,104 @@
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import feed_cache, timeline, trending
+from .models import Comment, Follow, Group, Post
+from .stats import invalidate_author_stats
+
+
+@receiver(post_save, sender=Post)
+def fan_out_post(sender, instance, created, **kwargs):
+    if created:
+        timeline.fan_out(instance)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def bump_feed_versions(sender, instance, **kwargs):
+    feed_cache.bump_post(instance)
+
+
+@receiver(post_save, sender=Group)
+def bump_group_feeds(sender, instance, **kwargs):
+    # Название группы есть на карточках постов в общей ленте.
+    feed_cache.bump(
+        feed_cache.GLOBAL_FEED,
+        feed_cache.TRENDING_FEED,
+        feed_cache.group_feed(instance.pk),
+    )
+
+
+@receiver(post_save, sender=Comment)
+def count_comment(sender, instance, created, raw=False, **kwargs):
+    # Счётчик в сигналах, а не в представлении: так его сдвигают и
+    # комментарии из админки. Фикстуры приносят счётчик с собой.
+    if created and not raw:
+        Post.objects.filter(pk=instance.post_id).update(
+            comments_count=F('comments_count') + 1
+        )
+
+
+@receiver(post_delete, sender=Comment)
+def uncount_comment(sender, instance, **kwargs):
+    # Удаление - и из админки, и каскадом с автором комментария.
+    Post.objects.filter(pk=instance.post_id, comments_count__gt=0).update(
+        comments_count=F('comments_count') - 1
+    )
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def bump_comment_feeds(sender, instance, **kwargs):
+    # Лента комментатора валидирует его страницы, где видны его счётчики;
+    # ленты поста - карточки со счётчиком и страницу самого поста.
+    # Так и комментарии из админки или импорта меняют ETag.
+    feed_cache.bump(
+        feed_cache.author_feed(instance.author_id),
+        *feed_cache.post_feeds(instance.post),
+    )
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def bump_follow_feeds(sender, instance, **kwargs):
+    feed_cache.bump(
+        feed_cache.author_feed(instance.user_id),
+        feed_cache.author_feed(instance.author_id),
+    )
+
+
+@receiver(post_save, sender=Comment)
+def comment_trending(sender, instance, created, **kwargs):
+    if created:
+        trending.add_comment(instance.post_id)
+
+
+@receiver(post_delete, sender=Comment)
+def uncomment_trending(sender, instance, **kwargs):
+    trending.add_comment(instance.post_id, -1)
+
+
+@receiver(post_save, sender=Follow)
+def backfill_timeline(sender, instance, created, **kwargs):
+    if created:
+        timeline.backfill(instance.user, instance.author)
+
+
+@receiver(post_delete, sender=Follow)
+def prune_timeline(sender, instance, **kwargs):
+    timeline.prune(instance.user, instance.author)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_stats(sender, instance, **kwargs):
+    invalidate_author_stats(instance.author_id)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_follow_stats(sender, instance, **kwargs):
+    invalidate_author_stats(instance.user_id, instance.author_id)
@@ -0,0 +1,41 @@
+"""Счётчики автора для профиля и страницы поста.
+
+Считаются одним запросом из коррелированных подзапросов и хранятся в
+кеше до ближайшего сигнала о новом посте, комментарии или подписке.
+"""
+from django.core.cache import cache
+from django.db.models import OuterRef
+
+from .models import Comment, Follow, Post, User, count_subquery
+from .settings import AUTHOR_STATS_CACHE_TIMEOUT
+
+
+def stats_key(author_id):
+    return f'author-stats:{author_id}'
+
+
+def get_author_stats(author_id):
+    key = stats_key(author_id)
+    stats = cache.get(key)
+    if stats is None:
+        stats = User.objects.filter(pk=author_id).annotate(
+            posts_count=count_subquery(
+                Post.objects.filter(author=OuterRef('pk')), 'author'),
+            comments_count=count_subquery(
+                Comment.objects.filter(author=OuterRef('pk')), 'author'),
+            follower_count=count_subquery(
+                Follow.objects.filter(user=OuterRef('pk')), 'user'),
+            following_count=count_subquery(
+                Follow.objects.filter(author=OuterRef('pk')), 'author'),
+        ).values(
+            'posts_count',
+            'comments_count',
+            'follower_count',
+            'following_count',
+        ).get()
+        cache.set(key, stats, AUTHOR_STATS_CACHE_TIMEOUT)
+    return stats
+
+
+def invalidate_author_stats(*author_ids):
+    cache.delete_many([stats_key(author_id) for author_id in author_ids])
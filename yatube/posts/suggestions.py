@@ -0,0 +1,93 @@
+"""Кого читать: кандидаты из графа подписок и общих лайков.
+
+Считать друзей друзей при каждом запросе слишком дорого, поэтому
+кандидаты собираются периодически (команда build_suggestions) и
+хранятся в таблице Suggestion: не больше SUGGESTIONS_LIMIT строк на
+пользователя. Страница читает их одним запросом по индексу (user, -score).
+
+Вес кандидата - число авторов читателя, подписанных на него, плюс
+SUGGESTION_LIKE_WEIGHT за каждый пост, который оба лайкнули.
+"""
+import collections
+import heapq
+from operator import itemgetter
+
+from django.db import transaction
+from django.db.models import Count, F, Max
+
+from . import feed_cache
+from .models import Follow, Post, Suggestion, User
+from .settings import (SUGGESTION_LIKE_WEIGHT, SUGGESTIONS_LIMIT,
+                       SUGGESTIONS_SHOWN)
+
+Like = Post.likes.through
+
+
+def second_degree(readers):
+    """(читатель, кандидат, сколько авторов читателя на него подписаны)."""
+    return Follow.objects.filter(
+        user__following__user__in=readers
+    ).values_list(
+        F('user__following__user'), 'author'
+    ).annotate(overlap=Count('pk')).order_by()
+
+
+def co_likes(readers):
+    """(читатель, кандидат, сколько постов оба лайкнули)."""
+    return Like.objects.filter(
+        post__likes__in=readers
+    ).values_list(
+        F('post__likes'), 'user'
+    ).annotate(shared=Count('pk')).order_by()
+
+
+def score(readers):
+    """Лучшие кандидаты для каждого читателя пачки."""
+    following = collections.defaultdict(set)
+    for user_id, author_id in Follow.objects.filter(
+        user__in=readers
+    ).values_list('user', 'author'):
+        following[user_id].add(author_id)
+    scores = collections.defaultdict(collections.Counter)
+    for reader, candidate, overlap in second_degree(readers):
+        scores[reader][candidate] += overlap
+    for reader, candidate, shared in co_likes(readers):
+        scores[reader][candidate] += shared * SUGGESTION_LIKE_WEIGHT
+    for reader, candidates in scores.items():
+        for author_id in following[reader] | {reader}:
+            candidates.pop(author_id, None)
+        yield reader, heapq.nlargest(
+            SUGGESTIONS_LIMIT, candidates.items(), key=itemgetter(1)
+        )
+
+
+def build(batch_size=1000):
+    """Пересобирает таблицу рекомендаций пачками по ключу пользователя."""
+    last_pk = User.objects.aggregate(last=Max('pk'))['last'] or 0
+    total = 0
+    for start in range(0, last_pk + 1, batch_size):
+        readers = list(User.objects.filter(
+            pk__gte=start, pk__lt=start + batch_size
+        ).values_list('pk', flat=True))
+        rows = [
+            Suggestion(user_id=reader, author_id=author_id, score=weight)
+            for reader, best in score(readers)
+            for author_id, weight in best
+        ]
+        with transaction.atomic():
+            Suggestion.objects.filter(user__in=readers).delete()
+            Suggestion.objects.bulk_create(rows)
+        total += len(rows)
+    feed_cache.bump(feed_cache.SUGGESTIONS)
+    return total
+
+
+def get_suggestions(user):
+    """Авторы для блока «Кого читать» без тех, на кого уже подписан."""
+    return [
+        suggestion.author for suggestion in Suggestion.objects.filter(
+            user=user
+        ).exclude(
+            author__in=Follow.objects.filter(user=user).values('author')
+        ).select_related('author').order_by('-score')[:SUGGESTIONS_SHOWN]
+    ]
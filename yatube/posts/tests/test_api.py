@@ -0,0 +1,174 @@
+import base64
+import json
+from http import HTTPStatus
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post, User
+from ..settings import API_PAGE_LIMIT
+
+SLUG = 'Test_slug'
+USERNAME = 'TestTestov'
+USERNAME_2 = 'IvanIvanov'
+API_POSTS = reverse('posts:api_posts')
+API_GROUPS = reverse('posts:api_groups')
+API_FOLLOW = reverse('posts:api_follow')
+
+
+class ApiTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=USERNAME)
+        cls.reader = User.objects.create_user(username=USERNAME_2)
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug=SLUG,
+            description='Тестовое описание',
+        )
+        cls.posts = [
+            Post.objects.create(
+                author=cls.user, text=f'Тестовый пост {number}',
+                group=cls.group,
+            )
+            for number in range(API_PAGE_LIMIT + 3)
+        ]
+        cls.post = cls.posts[-1]
+        cls.post.likes.add(cls.reader)
+        Comment.objects.create(
+            author=cls.reader, text='Тестовый комент', post=cls.post
+        )
+        Post.objects.recount()
+        Follow.objects.create(user=cls.reader, author=cls.user)
+        cls.API_POST = reverse(
+            'posts:api_post', kwargs={'post_id': cls.post.pk}
+        )
+        cls.API_COMMENTS = reverse(
+            'posts:api_post_comments', kwargs={'post_id': cls.post.pk}
+        )
+        cls.authorized = Client()
+        cls.authorized.force_login(cls.reader)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_posts_list_with_cursor(self):
+        """Список постов листается курсором без повторов"""
+        first = self.client.get(API_POSTS).json()
+        self.assertEqual(len(first['results']), API_PAGE_LIMIT)
+        self.assertEqual(first['results'][0], {
+            'id': self.post.pk,
+            'text': self.post.text,
+            'pub_date': first['results'][0]['pub_date'],
+            'modified': first['results'][0]['modified'],
+            'author': USERNAME,
+            'group': SLUG,
+            'image': None,
+            'likes_count': 1,
+            'comments_count': 1,
+        })
+        self.assertIsNone(first['previous'])
+        second = self.client.get(first['next']).json()
+        self.assertEqual(len(second['results']), 3)
+        self.assertIsNone(second['next'])
+        ids = [post['id'] for post in first['results'] + second['results']]
+        self.assertEqual(
+            sorted(ids), sorted(post.pk for post in self.posts)
+        )
+
+    def test_sparse_fields(self):
+        """?fields= оставляет в ответе только выбранные поля"""
+        response = self.client.get(API_POSTS, {'fields': 'id,author'})
+        self.assertEqual(
+            response.json()['results'][0],
+            {'id': self.post.pk, 'author': USERNAME},
+        )
+        response = self.client.get(API_POSTS, {'fields': 'id,password'})
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
+    def test_posts_list_has_no_per_object_queries(self):
+        """Число запросов не зависит от числа постов на странице"""
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(API_POSTS)
+        # Запрос страницы, версия ленты - в кеше.
+        self.assertEqual(len(queries), 1)
+
+    def test_broken_cursor(self):
+        """Курсор с null или Infinity открывает первую страницу списка"""
+        for values in ([None, 1], [float('inf'), 1], [1, None]):
+            cursor = base64.urlsafe_b64encode(
+                json.dumps(['n', values]).encode()
+            ).decode()
+            for client, url in [
+                (self.client, API_POSTS),
+                (self.client, API_GROUPS),
+                (self.client, self.API_COMMENTS),
+                (self.authorized, API_FOLLOW),
+            ]:
+                with self.subTest(url=url, values=values):
+                    response = client.get(url, {'cursor': cursor})
+                    self.assertEqual(response.status_code, HTTPStatus.OK)
+                    self.assertIsNone(response.json()['previous'])
+
+    def test_filters_detail_and_comments(self):
+        """Фильтр по автору, пост с выбранными полями и комментарии"""
+        response = self.client.get(API_POSTS, {'author': USERNAME_2})
+        self.assertEqual(response.json()['results'], [])
+        post = self.client.get(self.API_POST, {'fields': 'id,text'}).json()
+        self.assertEqual(post, {'id': self.post.pk, 'text': self.post.text})
+        comments = self.client.get(self.API_COMMENTS).json()['results']
+        self.assertEqual(comments[0]['author'], USERNAME_2)
+        self.assertEqual(
+            self.client.get(
+                reverse('posts:api_post', kwargs={'post_id': 0})
+            ).status_code,
+            HTTPStatus.NOT_FOUND,
+        )
+
+    def test_groups_embed_posts_count(self):
+        """Группы отдаются с числом постов"""
+        groups = self.client.get(API_GROUPS).json()['results']
+        self.assertEqual(groups[0]['posts_count'], len(self.posts))
+        group = self.client.get(
+            reverse('posts:api_group', kwargs={'slug': SLUG})
+        ).json()
+        self.assertEqual(group['slug'], SLUG)
+
+    def test_etag(self):
+        """Неизменный ответ отдаётся как 304 до нового комментария"""
+        for url in [API_POSTS, self.API_POST, self.API_COMMENTS, API_GROUPS]:
+            with self.subTest(url=url):
+                etag = self.client.get(url)['ETag']
+                self.assertEqual(
+                    self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code,
+                    HTTPStatus.NOT_MODIFIED,
+                )
+        etag = self.client.get(self.API_COMMENTS)['ETag']
+        self.authorized.post(
+            reverse('posts:add_comment', kwargs={'post_id': self.post.pk}),
+            {'text': 'Новый комент'},
+        )
+        self.assertEqual(
+            self.client.get(
+                self.API_COMMENTS, HTTP_IF_NONE_MATCH=etag
+            ).status_code,
+            HTTPStatus.OK,
+        )
+
+    def test_follow_feed(self):
+        """Лента подписок только для своих, ETag считается по телу"""
+        self.assertEqual(
+            self.client.get(API_FOLLOW).status_code, HTTPStatus.UNAUTHORIZED
+        )
+        response = self.authorized.get(API_FOLLOW)
+        self.assertEqual(len(response.json()['results']), API_PAGE_LIMIT)
+        self.assertEqual(
+            self.authorized.get(
+                API_FOLLOW, HTTP_IF_NONE_MATCH=response['ETag']
+            ).status_code,
+            HTTPStatus.NOT_MODIFIED,
+        )
@@ -0,0 +1,313 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post, Suggestion, User
+from ..suggestions import get_suggestions
+from ..timeline import timeline_posts
+
+USERNAME = 'TestTestov'
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+class RecountPostCountersTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=USERNAME)
+        cls.post = Post.objects.create(author=cls.user, text='Тестовый пост')
+        cls.post.likes.add(cls.user)
+        Comment.objects.create(
+            author=cls.user,
+            text='Тестовый комент',
+            post=cls.post
+        )
+
+    def test_recount_post_counters(self):
+        """Команда находит и исправляет неверные счётчики"""
+        with self.assertRaises(CommandError):
+            call_command('recount_post_counters', check=True)
+        call_command('recount_post_counters', stdout=StringIO())
+        post = Post.objects.get(pk=self.post.pk)
+        self.assertEqual(post.likes_count, 1)
+        self.assertEqual(post.comments_count, 1)
+        call_command('recount_post_counters', check=True, stdout=StringIO())
+
+
+class BuildSuggestionsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader, cls.first, cls.second, cls.friend, cls.liker = [
+            User.objects.create_user(username=f'{USERNAME}{number}')
+            for number in range(5)
+        ]
+        for user, author in [
+            (cls.reader, cls.first),
+            (cls.reader, cls.second),
+            (cls.first, cls.friend),
+            (cls.second, cls.friend),
+            (cls.second, cls.reader),
+        ]:
+            Follow.objects.create(user=user, author=author)
+        post = Post.objects.create(author=cls.first, text='Тестовый пост')
+        post.likes.add(cls.reader, cls.liker)
+
+    def test_build_suggestions(self):
+        """Друзья друзей по числу общих авторов, затем общие лайки"""
+        call_command('build_suggestions', batch_size=2, stdout=StringIO())
+        self.assertEqual(
+            list(Suggestion.objects.filter(user=self.reader).order_by(
+                '-score'
+            ).values_list('author', 'score')),
+            [(self.friend.pk, 2), (self.liker.pk, 0.5)],
+        )
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                get_suggestions(self.reader), [self.friend, self.liker]
+            )
+        client = Client()
+        client.force_login(self.reader)
+        response = client.get(reverse(
+            'posts:profile', kwargs={'username': self.first.username}
+        ))
+        self.assertEqual(
+            response.context['suggestions'], [self.friend, self.liker]
+        )
+        client.get(reverse(
+            'posts:profile_follow', kwargs={'username': self.friend.username}
+        ))
+        response = client.get(reverse('posts:follow_index'))
+        self.assertEqual(response.context['suggestions'], [self.liker])
+
+
+class ExplainFeedsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=USERNAME)
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='Test_slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user, text='Тестовый пост', group=cls.group
+        )
+        Comment.objects.create(
+            author=cls.user,
+            text='Тестовый комент',
+            post=cls.post
+        )
+
+    def test_feeds_use_composite_indexes(self):
+        """Ленты читаются по составным индексам"""
+        out = StringIO()
+        call_command('explain_feeds', repeat=1, compare=True, stdout=out)
+        with_indexes, without_indexes = out.getvalue().split('Без индексов')
+        for index in (
+            'post_pub_date_idx',
+            'post_group_pub_date_idx',
+            'post_author_pub_date_idx',
+            'comment_post_created_idx',
+            'follow_author_user_idx',
+        ):
+            with self.subTest(index=index):
+                self.assertIn(index, with_indexes)
+                self.assertNotIn(index, without_indexes)
+        self.assertNotIn('TEMP B-TREE', with_indexes)
+
+
+class TransferTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=USERNAME)
+        cls.reader = User.objects.create_user(username='IvanIvanov')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='Test_slug',
+            description='Тестовое описание',
+        )
+        cls.posts = [
+            Post.objects.create(
+                author=cls.user,
+                text=f'Тестовый пост {number}',
+                group=cls.group,
+                image='posts/small.gif',
+            )
+            for number in range(3)
+        ]
+        cls.posts[0].likes.add(cls.reader)
+        Comment.objects.create(
+            author=cls.reader, text='Тестовый комент', post=cls.posts[0]
+        )
+        Follow.objects.create(user=cls.reader, author=cls.user)
+        Post.objects.recount()
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, 'dump.jsonl')
+
+    def snapshot(self):
+        return {
+            'posts': list(Post.objects.order_by('pk').values_list(
+                'pk', 'text', 'pub_date', 'author__username', 'group__slug',
+                'image', 'likes_count', 'comments_count',
+            )),
+            'comments': list(Comment.objects.values_list(
+                'pk', 'text', 'created', 'author__username', 'post'
+            )),
+            'follows': list(Follow.objects.values_list(
+                'user__username', 'author__username'
+            )),
+            'likes': list(Post.likes.through.objects.values_list(
+                'post', 'user__username'
+            )),
+        }
+
+    def wipe(self):
+        Post.objects.all().delete()
+        Group.objects.all().delete()
+        User.objects.all().delete()
+
+    def test_export_import_round_trip(self):
+        """Выгрузка загружается в пустую базу без потерь"""
+        before = self.snapshot()
+        call_command(
+            'export_yatube', self.path, batch_size=2, stdout=StringIO()
+        )
+        self.wipe()
+        call_command(
+            'import_yatube', self.path, batch_size=2, stdout=StringIO()
+        )
+        self.assertEqual(self.snapshot(), before)
+        self.assertEqual(
+            timeline_posts(User.objects.get(username='IvanIvanov')).count(),
+            len(self.posts),
+        )
+        self.assertFalse(os.path.exists(f'{self.path}.checkpoint'))
+
+    def test_import_reports_conflicts(self):
+        """Записи с ключами, которые уже есть в базе, попадают в отчёт"""
+        before = self.snapshot()
+        call_command('export_yatube', self.path, stdout=StringIO())
+        Post.objects.filter(pk=self.posts[0].pk).delete()
+        output = StringIO()
+        call_command('import_yatube', self.path, stdout=output)
+        self.assertEqual(self.snapshot(), before)
+        output = output.getvalue()
+        self.assertIn('post: 1\n', output)
+        self.assertIn(
+            f'post: {len(self.posts) - 1} уже есть в базе', output
+        )
+        self.assertIn('user: 2 уже есть в базе', output)
+
+    def test_import_skips_records_of_skipped_posts(self):
+        """Комментарии и лайки пропущенного поста не цепляются к чужому"""
+        call_command('export_yatube', self.path, stdout=StringIO())
+        Comment.objects.all().delete()
+        self.posts[0].likes.clear()
+        output = StringIO()
+        call_command('import_yatube', self.path, stdout=output)
+        self.assertFalse(Comment.objects.exists())
+        self.assertFalse(self.posts[0].likes.exists())
+        output = output.getvalue()
+        self.assertIn('comment: 1 ссылается на пропущенные записи', output)
+        self.assertIn('like: 1 ссылается на пропущенные записи', output)
+
+    def test_import_resume_keeps_skipped_posts(self):
+        """Пропущенные посты переживают продолжение с контрольной точки"""
+        call_command('export_yatube', self.path, stdout=StringIO())
+        with open(self.path, 'rb') as dump:
+            lines = dump.readlines()
+        comments = next(
+            number for number, line in enumerate(lines)
+            if b'"kind": "comment"' in line
+        )
+        Comment.objects.all().delete()
+        with open(f'{self.path}.checkpoint', 'w') as checkpoint:
+            json.dump({
+                'offset': sum(len(line) for line in lines[:comments]),
+                'skipped': {'post': [[self.posts[0].pk]]},
+            }, checkpoint)
+        call_command(
+            'import_yatube', self.path, resume=True, stdout=StringIO()
+        )
+        self.assertFalse(Comment.objects.exists())
+
+    def test_import_resumes_from_checkpoint(self):
+        """Загрузка продолжается с контрольной точки"""
+        before = self.snapshot()
+        call_command('export_yatube', self.path, stdout=StringIO())
+        with open(self.path, 'rb') as dump:
+            lines = dump.readlines()
+        # Заголовок, два пользователя и группа уже загружены.
+        offset = sum(len(line) for line in lines[:4])
+        self.assertIn(b'"kind": "post"', lines[4])
+        Post.objects.all().delete()
+        with open(f'{self.path}.checkpoint', 'w') as checkpoint:
+            json.dump({'offset': offset}, checkpoint)
+        call_command(
+            'import_yatube', self.path, resume=True, stdout=StringIO()
+        )
+        self.assertEqual(self.snapshot(), before)
+
+    def test_export_resumes_from_checkpoint(self):
+        """Выгрузка продолжается с контрольной точки без повторов"""
+        call_command('export_yatube', self.path, stdout=StringIO())
+        with open(self.path, 'rb') as dump:
+            full = dump.read()
+        call_command(
+            'export_yatube', self.path, batch_size=1, stdout=StringIO()
+        )
+        with open(self.path, 'rb') as dump:
+            lines = dump.readlines()
+        offset = sum(len(line) for line in lines[:5])
+        self.assertIn(b'"kind": "post"', lines[4])
+        with open(f'{self.path}.checkpoint', 'w') as checkpoint:
+            json.dump(
+                {'kind': 'post', 'last_pk': self.posts[0].pk,
+                 'offset': offset},
+                checkpoint,
+            )
+        call_command(
+            'export_yatube', self.path, resume=True, stdout=StringIO()
+        )
+        with open(self.path, 'rb') as dump:
+            self.assertEqual(dump.read(), full)
+
+
+class GenerateThumbnailsTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        media = self.settings(MEDIA_ROOT=directory.name)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.post = Post.objects.create(
+            author=User.objects.create_user(username=USERNAME),
+            text='Тестовый пост',
+            image=SimpleUploadedFile('small.gif', SMALL_GIF, 'image/gif'),
+        )
+
+    def test_generate_thumbnails_touches_posts(self):
+        """После нарезки посты получают новую дату изменения"""
+        call_command('generate_thumbnails', processes=1, stdout=StringIO())
+        self.assertGreater(
+            Post.objects.get(pk=self.post.pk).modified, self.post.modified
+        )
@@ -1,12 +1,17 @@
 import shutil
 import tempfile
+from io import BytesIO
+from unittest import mock
 
 from django.conf import settings
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
+from PIL import Image
 
+from ..forms import PostForm
 from ..models import Comment, Group, Post, User
+from ..settings import IMAGE_MAX_SIDE
 
 SLUG_1 = 'Test_slug_1'
 SLUG_2 = 'Test_slug_2'
@@ -45,6 +50,8 @@ UPLOADED_ANOTHER = SimpleUploadedFile(
     content_type='image/gif'
 )
 IMAGE_UPLOAD_TO = Post.image.field.upload_to
+EXIF_ORIENTATION = 0x0112
+EXIF_MAKE = 0x010F
 
 
 @override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
@@ -183,8 +190,34 @@ class PostPagesTests(TestCase):
         self.assertEqual(comment.text, form_data['text'])
         self.assertEqual(comment.author, self.user)
         self.assertEqual(comment.post, self.post)
+        self.assertEqual(
+            Post.objects.get(pk=self.post.pk).comments_count, 1
+        )
         self.assertRedirects(response, self.POST_DETAIL)
 
+    def test_comments_count_outside_view(self):
+        """Счётчик следует за комментариями, созданными и удалёнными в ORM"""
+        Comment.objects.all().delete()
+        Post.objects.filter(pk=self.post.pk).update(comments_count=0)
+        commenter = User.objects.create_user(username='commenter')
+        comment = Comment.objects.create(
+            author=self.user, post=self.post, text='Из админки'
+        )
+        Comment.objects.create(
+            author=commenter, post=self.post, text='Комментарий'
+        )
+        self.assertEqual(
+            Post.objects.get(pk=self.post.pk).comments_count, 2
+        )
+        comment.delete()
+        self.assertEqual(
+            Post.objects.get(pk=self.post.pk).comments_count, 1
+        )
+        commenter.delete()
+        self.assertEqual(
+            Post.objects.get(pk=self.post.pk).comments_count, 0
+        )
+
     def test_guest_add_post(self):
         """Неавторизованный пользователь не может создать пост"""
         Post.objects.all().delete()
@@ -212,3 +245,74 @@ class PostPagesTests(TestCase):
             follow=True
         )
         self.assertEqual(Comment.objects.count(), 0)
+
+
+def jpeg_upload(name, size, orientation=None):
+    image = Image.new('RGB', size, (200, 10, 10))
+    exif = Image.Exif()
+    if orientation:
+        exif[EXIF_ORIENTATION] = orientation
+    exif[EXIF_MAKE] = 'Camera'
+    content = BytesIO()
+    image.save(content, 'JPEG', exif=exif.tobytes())
+    return SimpleUploadedFile(
+        name=name, content=content.getvalue(), content_type='image/jpeg'
+    )
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ImageUploadTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_upload_is_rotated_downscaled_and_stripped(self):
+        """Картинка повёрнута по EXIF, уменьшена и пересохранена"""
+        form = PostForm(
+            data={'text': 'Тестовый пост'},
+            files={'image': jpeg_upload('photo.jpg', (4000, 1000), 6)},
+        )
+        self.assertTrue(form.is_valid(), form.errors)
+        image = form.cleaned_data['image']
+        self.assertEqual(image.name, 'photo.jpg')
+        saved = Image.open(image)
+        self.assertEqual(
+            saved.size, (IMAGE_MAX_SIDE * 1000 // 4000, IMAGE_MAX_SIDE)
+        )
+        self.assertNotIn('exif', saved.info)
+        self.assertTrue(saved.info.get('progressive'))
+
+    def test_png_resolution_is_capped(self):
+        """PNG, который draft() не уменьшает, ограничен меньшим пределом"""
+        content = BytesIO()
+        Image.new('RGB', (100, 100)).save(content, 'PNG')
+        png = SimpleUploadedFile(
+            'picture.png', content.getvalue(), content_type='image/png'
+        )
+        with mock.patch('posts.images.IMAGE_MAX_DECODED_PIXELS', 9999):
+            form = PostForm(
+                data={'text': 'Тестовый пост'}, files={'image': png}
+            )
+            self.assertFalse(form.is_valid())
+        self.assertEqual(
+            form.errors['image'].as_data()[0].code, 'too_many_pixels'
+        )
+        with mock.patch('posts.images.IMAGE_MAX_DECODED_PIXELS', 9999):
+            form = PostForm(
+                data={'text': 'Тестовый пост'},
+                files={'image': jpeg_upload('photo.jpg', (100, 100))},
+            )
+            self.assertTrue(form.is_valid(), form.errors)
+
+    def test_upload_size_is_capped(self):
+        """Слишком большой файл картинки не проходит валидацию"""
+        with mock.patch('posts.images.IMAGE_MAX_UPLOAD_SIZE', 100):
+            form = PostForm(
+                data={'text': 'Тестовый пост'},
+                files={'image': jpeg_upload('photo.jpg', (100, 100))},
+            )
+            self.assertFalse(form.is_valid())
+        self.assertEqual(
+            form.errors['image'].as_data()[0].code, 'file_too_large'
+        )
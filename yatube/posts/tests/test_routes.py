@@ -8,6 +8,7 @@ USERNAME = 'TestTestov'
 POST_ID = 1
 CASES = [
     ['/', 'index', []],
+    ['/trending/', 'trending', []],
     [f'/group/{SLUG}/', 'group_list', [SLUG]],
     [f'/profile/{USERNAME}/', 'profile', [USERNAME]],
     [f'/posts/{POST_ID}/', 'post_detail', [POST_ID]],
@@ -10,6 +10,7 @@ SLUG = 'Test_slug'
 USERNAME_1 = 'TestTestov'
 USERNAME_2 = 'IvanIvanov'
 INDEX = reverse('posts:index')
+TRENDING = reverse('posts:trending')
 CREATE_POST = reverse('posts:post_create')
 GROUP_LIST = reverse('posts:group_list', kwargs={'slug': SLUG})
 PROFILE = reverse('posts:profile', kwargs={'username': USERNAME_1})
@@ -63,6 +64,7 @@ class PostURLTests(TestCase):
         """Проверка доступности страниц"""
         CASES = [
             [INDEX, self.guest, OK],
+            [TRENDING, self.guest, OK],
             [GROUP_LIST, self.guest, OK],
             [self.POST_DETAIL, self.guest, OK],
             [PROFILE, self.guest, OK],
@@ -120,6 +122,7 @@ class PostURLTests(TestCase):
         cache.clear()
         templates_url_names = {
             INDEX: 'posts/index.html',
+            TRENDING: 'posts/trending.html',
             GROUP_LIST: 'posts/group_list.html',
             PROFILE: 'posts/profile.html',
             self.POST_DETAIL: 'posts/post_detail.html',
@@ -1,15 +1,32 @@
+import base64
+import json
 import shutil
 import tempfile
+import threading
+from http import HTTPStatus
+from io import StringIO
+from unittest import mock
 
 from django.conf import settings
 from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import Client, TestCase, override_settings
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.template import engines
+from django.test import (Client, RequestFactory, TestCase,
+                         TransactionTestCase, override_settings)
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 
-from ..models import Follow, Group, Post, User
-from ..settings import PAGINATOR_LIMIT
+from .. import concurrent, ratelimit, search, trending
+from ..models import (Comment, Follow, Group, Post, TimelineEntry, Trending,
+                      User)
+from ..settings import (COMMENTS_LIMIT, PAGINATOR_LIMIT,
+                        POST_CARD_CACHE_TIMEOUT, POST_THUMBNAILS, RATE_LIMITS,
+                        TRENDING_COMMENT_WEIGHT, TRENDING_HALF_LIFE,
+                        TRENDING_LIKE_WEIGHT)
+from ..thumbnails import backend, generate_thumbnails
 
 SLUG_1 = 'Test_slug_1'
 SLUG_2 = 'Test_slug_2'
@@ -39,7 +56,16 @@ UPLOADED = SimpleUploadedFile(
     content_type='image/gif'
 )
 FOLLOW_INDEX = reverse('posts:follow_index')
+SEARCH = reverse('posts:search')
+TRENDING = reverse('posts:trending')
 FOLLOW_INDEX_PAGE_2 = FOLLOW_INDEX + '?page=2'
+# Курсоры с null, бесконечностью и не скалярными значениями ключа.
+BROKEN_CURSORS = [
+    base64.urlsafe_b64encode(json.dumps(['n', values]).encode()).decode()
+    for values in (
+        [None, 1], [1.5, None], [float('inf'), 1], [[1], 1], 'x', None,
+    )
+]
 FOLLOW = reverse('posts:profile_follow', kwargs={'username': USERNAME})
 UNFOLLOW = reverse('posts:profile_unfollow', kwargs={'username': USERNAME})
 
@@ -79,6 +105,7 @@ class PostPagesTests(TestCase):
         cls.authorized_client.force_login(cls.user)
         cls.authorized_2 = Client()
         cls.authorized_2.force_login(cls.user_2)
+        cls.guest = Client()
 
     @classmethod
     def tearDownClass(cls):
@@ -155,18 +182,423 @@ class PostPagesTests(TestCase):
             author=self.user).exists()
         )
 
+    def test_timeline_fan_out(self):
+        """Лента подписок заполняется при записи и чистится при отписке"""
+        self.authorized_2.get(FOLLOW)
+        new_post = Post.objects.create(author=self.user, text='Новый пост')
+        self.assertEqual(
+            set(TimelineEntry.objects.filter(
+                user=self.user_2).values_list('post', flat=True)),
+            {self.post.pk, new_post.pk}
+        )
+        self.assertIn(
+            new_post, self.authorized_2.get(FOLLOW_INDEX).context['page_obj']
+        )
+        self.authorized_2.get(UNFOLLOW)
+        self.assertFalse(TimelineEntry.objects.filter(user=self.user_2))
+
+    @mock.patch('posts.timeline.TIMELINE_FANOUT_LIMIT', 0)
+    def test_timeline_large_author(self):
+        """Посты крупных авторов читаются из ленты без раскладки"""
+        self.authorized_2.get(FOLLOW)
+        new_post = Post.objects.create(author=self.user, text='Новый пост')
+        self.assertFalse(new_post.timeline.exists())
+        self.assertFalse(Post.objects.get(pk=new_post.pk).fanned_out)
+        self.assertEqual(
+            list(self.authorized_2.get(FOLLOW_INDEX).context['page_obj']),
+            [new_post, self.post]
+        )
+
+    def test_timeline_author_shrinks(self):
+        """Пост крупного автора остаётся в ленте, когда подписчиков мало"""
+        self.authorized_2.get(FOLLOW)
+        with mock.patch('posts.timeline.TIMELINE_FANOUT_LIMIT', 0):
+            large_post = Post.objects.create(
+                author=self.user, text='Пост крупного автора'
+            )
+        new_post = Post.objects.create(author=self.user, text='Новый пост')
+        self.assertEqual(
+            list(self.authorized_2.get(FOLLOW_INDEX).context['page_obj']),
+            [new_post, large_post, self.post]
+        )
+        with mock.patch('posts.views.PAGINATOR_LIMIT', 2):
+            page = self.authorized_2.get(
+                FOLLOW_INDEX, {'cursor': ''}
+            ).context['page_obj']
+            self.assertEqual(list(page), [new_post, large_post])
+            page = self.authorized_2.get(
+                FOLLOW_INDEX, {'cursor': page.next_cursor}
+            ).context['page_obj']
+            self.assertEqual(list(page), [self.post])
+            page = self.authorized_2.get(
+                FOLLOW_INDEX, {'cursor': page.previous_cursor}
+            ).context['page_obj']
+            self.assertEqual(list(page), [new_post, large_post])
+
+    def test_like_toggles_counter(self):
+        """Лайк ставится и снимается вместе со счётчиком."""
+        like = reverse('posts:like', kwargs={'post_id': self.post.pk})
+        for likes_count in (1, 0):
+            with self.subTest(likes_count=likes_count):
+                self.authorized_2.post(like, {'text': INDEX})
+                post = Post.objects.get(pk=self.post.pk)
+                self.assertEqual(post.likes_count, likes_count)
+                self.assertEqual(post.likes.count(), likes_count)
+
+    def test_author_stats(self):
+        """Счётчики автора пересчитываются после новой подписки."""
+        cache.clear()
+        stats = self.authorized_client.get(PROFILE).context['author_stats']
+        self.assertEqual(stats, {
+            'posts_count': 1,
+            'comments_count': 0,
+            'follower_count': 0,
+            'following_count': 0,
+        })
+        self.authorized_2.get(FOLLOW)
+        for url in [PROFILE, self.POST_DETAIL]:
+            with self.subTest(url=url):
+                stats = self.authorized_client.get(url).context[
+                    'author_stats'
+                ]
+                self.assertEqual(stats['following_count'], 1)
+
+    def test_thumbnail_fallback(self):
+        """До нарезки шаблоны получают оригинал картинки."""
+        geometry, options = POST_THUMBNAILS[0]
+        image = self.post.image
+        self.assertEqual(
+            backend.get_thumbnail(image, geometry, **options).name,
+            image.name
+        )
+        generate_thumbnails(image.name)
+        thumbnail = backend.get_thumbnail(image, geometry, **options)
+        self.assertNotEqual(thumbnail.name, image.name)
+        self.assertTrue(thumbnail.exists())
+
+    def test_comments_paginated(self):
+        """Комментарии отдаются порциями, продолжение — фрагментом"""
+        Comment.objects.bulk_create(
+            Comment(author=self.user_2, post=self.post, text=f'Комент {i}')
+            for i in range(COMMENTS_LIMIT + 3)
+        )
+        first = self.guest.get(self.POST_DETAIL).context['comments_page']
+        self.assertEqual(len(first), COMMENTS_LIMIT)
+        fragment = self.guest.get(
+            reverse('posts:post_comments', kwargs={'post_id': self.post.pk}),
+            {'cursor': first.next_cursor},
+        )
+        rest = fragment.context['comments_page']
+        self.assertEqual(len(rest), 3)
+        self.assertFalse(rest.has_next())
+        self.assertFalse(set(first) & set(rest))
+        self.assertTemplateUsed(fragment, 'posts/includes/comment_list.html')
+
+    def test_like_json(self):
+        """AJAX-лайк возвращает новое состояние и число лайков."""
+        like = reverse('posts:like', kwargs={'post_id': self.post.pk})
+        for liked, likes_count in ((True, 1), (False, 0)):
+            with self.subTest(liked=liked):
+                response = self.authorized_2.post(
+                    like, HTTP_X_REQUESTED_WITH='XMLHttpRequest'
+                )
+                self.assertEqual(response.json(), {
+                    'liked': liked,
+                    'likes_count': likes_count,
+                })
+
+    def test_like_redirect(self):
+        """Лайк без JS возвращает на страницу, с которой пришли."""
+        like = reverse('posts:like', kwargs={'post_id': self.post.pk})
+        redirects = {
+            INDEX: INDEX,
+            'https://example.com/': self.POST_DETAIL,
+        }
+        for next_url, redirect_url in redirects.items():
+            with self.subTest(next_url=next_url):
+                response = self.authorized_2.post(like, {'text': next_url})
+                self.assertRedirects(
+                    response, redirect_url, fetch_redirect_response=False
+                )
+
     def test_caches_index(self):
-        """Проверка кеширования страницы Index."""
-        self.assertNotEqual(Post.objects.count(), 0)
-        response_before = self.authorized_client.get(INDEX)
-        Post.objects.all().delete()
-        response_after = self.authorized_client.get(INDEX)
+        """Тело ленты кешируется до смены версии ленты."""
+        cache.clear()
+        guest = Client()
+        response_before = guest.get(INDEX)
+        Post.objects.filter(pk=self.post.pk).update(text='Тихая правка')
+        response_after = guest.get(INDEX)
         self.assertEqual(response_before.content, response_after.content)
+        post = Post.objects.get(pk=self.post.pk)
+        post.save()
+        self.assertIn(
+            'Тихая правка', guest.get(INDEX).content.decode()
+        )
+
+    def test_post_cards_read_cache_once(self):
+        """Тела карточек читаются из кеша одним get_many на страницу."""
+        cache.clear()
+        self.authorized_2.get(INDEX)
+        Post.objects.filter(pk=self.post.pk).update(text='Тихая правка')
+        with mock.patch.object(
+            cache, 'get_many', wraps=cache.get_many
+        ) as get_many:
+            content = self.authorized_2.get(INDEX).content.decode()
+        card_reads = [
+            keys for (keys, *_), _ in get_many.call_args_list
+            if any(key.startswith('template.cache.post_card') for key in keys)
+        ]
+        self.assertEqual(len(card_reads), 1)
+        self.assertNotIn('Тихая правка', content)
+        self.assertIn(reverse(
+            'posts:like', kwargs={'post_id': self.post.pk}
+        ), content)
+        Post.objects.get(pk=self.post.pk).save()
+        self.assertIn(
+            'Тихая правка', self.authorized_2.get(INDEX).content.decode()
+        )
+
+    def test_post_cards_follow_group_rename(self):
+        """Новое название группы видно на закешированных карточках."""
+        cache.clear()
+        guest = Client()
+        self.assertIn(self.group.title, guest.get(INDEX).content.decode())
+        group = Group.objects.get(pk=self.group.pk)
+        group.title = 'Переименованная группа'
+        group.save()
+        content = guest.get(INDEX).content.decode()
+        self.assertIn('Переименованная группа', content)
+
+    def test_post_cards_follow_author_rename(self):
+        """Ключ тела карточки меняется вместе с именем автора."""
+        request = RequestFactory().get(INDEX)
+        request.user = self.user_2
+        template = engines['django'].from_string(
+            '{% load post_cards %}{% post_cards posts %}'
+        )
+        template.render({'posts': [self.post]}, request)
+        post = Post.objects.for_feed().get(pk=self.post.pk)
+        post.author.first_name = 'Переименованный'
+        self.assertIn(
+            'Переименованный',
+            template.render({'posts': [post]}, request),
+        )
+
+    def test_post_cards_default_timeout(self):
+        """Без card_cache_timeout в контексте карточки не кешируются навечно"""
         cache.clear()
-        self.assertNotEqual(
-            response_before.content,
-            self.authorized_client.get(INDEX).content
+        request = RequestFactory().get(INDEX)
+        request.user = self.user_2
+        template = engines['django'].from_string(
+            '{% load post_cards %}{% post_cards posts %}'
+        )
+        with mock.patch.object(
+            cache, 'set_many', wraps=cache.set_many
+        ) as set_many:
+            template.render({'posts': [self.post]}, request)
+        (_, timeout), _ = set_many.call_args
+        self.assertEqual(timeout, POST_CARD_CACHE_TIMEOUT)
+
+    def test_like_invalidates_feeds(self):
+        """Лайк сразу виден в закешированных лентах."""
+        cache.clear()
+        guest = Client()
+        like = reverse('posts:like', kwargs={'post_id': self.post.pk})
+        urls = [INDEX, GROUP_LIST_1, PROFILE]
+        before = {url: guest.get(url).content for url in urls}
+        self.authorized_2.post(like, {'text': INDEX})
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertNotEqual(guest.get(url).content, before[url])
+
+    def test_conditional_get(self):
+        """Неизменная страница отдаётся ответом 304 без рендеринга."""
+        cache.clear()
+        like = reverse('posts:like', kwargs={'post_id': self.post.pk})
+        urls = [INDEX, GROUP_LIST_1, PROFILE, self.POST_DETAIL]
+        for url in urls:
+            with self.subTest(url=url):
+                # Первый ответ ставит CSRF-cookie, она входит в ETag.
+                self.authorized_2.get(url)
+                response = self.authorized_2.get(url)
+                etag = response['ETag']
+                self.assertFalse(response.has_header('Last-Modified'))
+                with self.assertTemplateNotUsed('posts/includes/post.html'):
+                    self.assertEqual(self.authorized_2.get(
+                        url, HTTP_IF_NONE_MATCH=etag
+                    ).status_code, HTTPStatus.NOT_MODIFIED)
+                self.assertEqual(
+                    self.authorized_client.get(
+                        url, HTTP_IF_NONE_MATCH=etag
+                    ).status_code,
+                    HTTPStatus.OK,
+                )
+                self.authorized_2.post(like, {'text': INDEX})
+                self.assertEqual(self.authorized_2.get(
+                    url, HTTP_IF_NONE_MATCH=etag
+                ).status_code, HTTPStatus.OK)
+
+    def test_comment_outside_view_changes_etag(self):
+        """Комментарий не из представления меняет ETag страниц поста."""
+        cache.clear()
+        for url in (PROFILE, self.POST_DETAIL):
+            with self.subTest(url=url):
+                self.authorized_2.get(url)
+                etag = self.authorized_2.get(url)['ETag']
+                comment = Comment.objects.create(
+                    author=self.user_2, post=self.post, text='Из админки'
+                )
+                self.assertNotEqual(self.authorized_2.get(url)['ETag'], etag)
+                etag = self.authorized_2.get(url)['ETag']
+                comment.delete()
+                self.assertNotEqual(self.authorized_2.get(url)['ETag'], etag)
+
+
+class SyndicationFeedsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=USERNAME)
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug=SLUG_1,
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user, text='Тестовый пост', group=cls.group
+        )
+        cls.feeds = {
+            reverse(name, kwargs=kwargs): content_type
+            for name, kwargs in [
+                ('posts:posts_rss', {}),
+                ('posts:group_rss', {'slug': SLUG_1}),
+                ('posts:profile_rss', {'username': USERNAME}),
+            ]
+            for content_type in ['application/rss+xml']
+        }
+        cls.feeds.update({
+            reverse(name, kwargs=kwargs): 'application/atom+xml'
+            for name, kwargs in [
+                ('posts:posts_atom', {}),
+                ('posts:group_atom', {'slug': SLUG_1}),
+                ('posts:profile_atom', {'username': USERNAME}),
+            ]
+        })
+
+    def setUp(self):
+        cache.clear()
+
+    def test_feeds_list_posts(self):
+        """Ленты RSS и Atom содержат посты"""
+        for url, content_type in self.feeds.items():
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertTrue(response['Content-Type'].startswith(
+                    content_type
+                ))
+                self.assertContains(response, self.post.text)
+
+    def test_feeds_are_cached_until_post_saved(self):
+        """Тело ленты кешируется до сохранения нового поста"""
+        for url in self.feeds:
+            with self.subTest(url=url):
+                etag = self.client.get(url)['ETag']
+                self.assertEqual(self.client.get(
+                    url, HTTP_IF_NONE_MATCH=etag
+                ).status_code, HTTPStatus.NOT_MODIFIED)
+                # Из базы читается только группа или автор по ключу.
+                with CaptureQueriesContext(connection) as queries:
+                    self.client.get(url)
+                self.assertLessEqual(len(queries), 1)
+        post = Post.objects.create(
+            author=self.user, text='Новый пост', group=self.group
+        )
+        for url in self.feeds:
+            with self.subTest(url=url):
+                self.assertContains(self.client.get(url), post.text)
+
+    def test_unknown_group_feed(self):
+        """Лента несуществующей группы - 404"""
+        self.assertEqual(
+            self.client.get(
+                reverse('posts:group_rss', kwargs={'slug': 'unknown'})
+            ).status_code,
+            HTTPStatus.NOT_FOUND,
+        )
+
+
+class SearchViewsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=USERNAME)
+        cls.best = Post.objects.create(
+            author=cls.user, text='Кот <b>кот</b> и ещё раз кот'
+        )
+        cls.other = Post.objects.create(
+            author=cls.user, text='Собака встретила кота. Кот убежал'
+        )
+        Post.objects.bulk_create(
+            Post(author=cls.user, text=f'Кот номер {i}')
+            for i in range(PAGINATOR_LIMIT)
+        )
+        Post.objects.create(author=cls.user, text='Про собак')
+        cls.guest = Client()
+
+    def test_search_ranked_and_highlighted(self):
+        """Поиск ранжирует по bm25 и подсвечивает найденные слова"""
+        page = self.guest.get(SEARCH, {'q': 'кот'}).context['page_obj']
+        self.assertEqual(len(page), PAGINATOR_LIMIT)
+        self.assertEqual(page[0], self.best)
+        self.assertIn('<mark>Кот</mark>', page[0].highlighted)
+        self.assertIn('&lt;b&gt;<mark>кот</mark>', page[0].highlighted)
+        rest = self.guest.get(
+            SEARCH, {'q': 'кот', 'cursor': page.next_cursor}
+        ).context['page_obj']
+        self.assertEqual(len(rest), 2)
+        self.assertFalse(set(page) & set(rest))
+
+    def test_invalid_rank_cursor(self):
+        """Курсор с нечисловым рангом открывает первую страницу поиска"""
+        cursor = search.SearchPaginator(
+            Post.objects.all(), PAGINATOR_LIMIT
+        ).encode_cursor('n', {'rank': 'x', 'id': self.best.pk})
+        page = self.guest.get(
+            SEARCH, {'q': 'кот', 'cursor': cursor}
+        ).context['page_obj']
+        self.assertEqual(page[0], self.best)
+        self.assertFalse(page.has_previous())
+
+    def test_search_index_follows_edits(self):
+        """Индекс поиска следует за правкой и удалением постов"""
+        Post.objects.filter(pk=self.other.pk).update(text='Только собака')
+        found = self.guest.get(SEARCH, {'q': 'собака'}).context['page_obj']
+        self.assertEqual(list(found), [self.other])
+        self.other.delete()
+        self.assertFalse(
+            self.guest.get(SEARCH, {'q': 'собака'}).context['page_obj']
+        )
+
+    def test_rebuild_search_index(self):
+        """Команда пересборки индекса сохраняет результаты поиска"""
+        before = list(
+            self.guest.get(SEARCH, {'q': 'кот'}).context['page_obj']
+        )
+        call_command('rebuild_search_index', batch_size=3, stdout=StringIO())
+        after = self.guest.get(SEARCH, {'q': 'кот'}).context['page_obj']
+        self.assertEqual(list(after), before)
+
+    def test_rebuild_search_index_is_atomic(self):
+        """Сбой пересборки оставляет прежний индекс целиком"""
+        before = list(
+            self.guest.get(SEARCH, {'q': 'кот'}).context['page_obj']
         )
+        # Сбой после первой порции: вывод прогресса падает.
+        stdout = mock.Mock(**{'write.side_effect': RuntimeError})
+        with self.assertRaises(RuntimeError):
+            call_command('rebuild_search_index', batch_size=1, stdout=stdout)
+        after = self.guest.get(SEARCH, {'q': 'кот'}).context['page_obj']
+        self.assertEqual(list(after), before)
 
 
 class PaginatorViewsTest(TestCase):
@@ -213,3 +645,305 @@ class PaginatorViewsTest(TestCase):
                 len(response.context['page_obj']),
                 count
             )
+
+    def test_cursor_paginator(self):
+        """Курсорная пагинация проходит ленты вперёд и назад"""
+        cache.clear()
+        for url in [INDEX, GROUP_LIST_1, PROFILE, FOLLOW_INDEX]:
+            with self.subTest(url=url):
+                first = self.another.get(url + '?cursor=').context['page_obj']
+                self.assertEqual(len(first), PAGINATOR_LIMIT)
+                self.assertIsNone(first.previous_cursor)
+                second = self.another.get(
+                    f'{url}?cursor={first.next_cursor}'
+                ).context['page_obj']
+                self.assertEqual(len(second), SECOND_PAGE_POSTS_COUNT)
+                self.assertIsNone(second.next_cursor)
+                self.assertFalse(set(first) & set(second))
+                back = self.another.get(
+                    f'{url}?cursor={second.previous_cursor}'
+                ).context['page_obj']
+                self.assertEqual(list(back), list(first))
+
+    def test_broken_cursor_opens_first_page(self):
+        """Курсор с null или Infinity открывает первую страницу, а не 500"""
+        post_detail = reverse(
+            'posts:post_detail', kwargs={'post_id': Post.objects.first().pk}
+        )
+        urls = [INDEX, GROUP_LIST_1, PROFILE, FOLLOW_INDEX, TRENDING]
+        for url in urls + [post_detail]:
+            for cursor in BROKEN_CURSORS:
+                with self.subTest(url=url, cursor=cursor):
+                    response = self.another.get(url, {'cursor': cursor})
+                    self.assertEqual(response.status_code, HTTPStatus.OK)
+        for url in urls:
+            with self.subTest(url=url):
+                page = self.another.get(
+                    url, {'cursor': BROKEN_CURSORS[0]}
+                ).context['page_obj']
+                self.assertIsNone(page.previous_cursor)
+
+    def test_feed_queries_do_not_grow_with_page(self):
+        """Число запросов ленты не зависит от числа постов на странице"""
+        for post in Post.objects.all()[:PAGINATOR_LIMIT]:
+            post.likes.add(self.user_2)
+        for url in [INDEX, GROUP_LIST_1, PROFILE, FOLLOW_INDEX]:
+            with self.subTest(url=url):
+                cache.clear()
+                with CaptureQueriesContext(connection) as full_page:
+                    self.another.get(url)
+                cache.clear()
+                with CaptureQueriesContext(connection) as short_page:
+                    self.another.get(url + '?page=2')
+                self.assertEqual(len(full_page), len(short_page))
+
+
+class TrendingViewsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=USERNAME)
+        cls.posts = [
+            Post.objects.create(author=cls.user, text=f'Тестовый пост {i}')
+            for i in range(PAGINATOR_LIMIT + 2)
+        ]
+        cls.authorized_client = Client()
+        cls.authorized_client.force_login(cls.user)
+
+    def setUp(self):
+        cache.clear()
+
+    def like(self, post):
+        self.authorized_client.post(
+            reverse('posts:like', kwargs={'post_id': post.pk})
+        )
+
+    def comment(self, post):
+        self.authorized_client.post(
+            reverse('posts:add_comment', kwargs={'post_id': post.pk}),
+            {'text': 'Тестовый комент'},
+        )
+
+    def scores(self):
+        return dict(Trending.objects.values_list('post', 'score'))
+
+    def test_events_update_scores(self):
+        """Лайки и комментарии меняют счёт без пересчёта"""
+        first, second = self.posts[:2]
+        self.like(first)
+        self.comment(second)
+        self.assertEqual(self.scores(), {
+            first.pk: TRENDING_LIKE_WEIGHT,
+            second.pk: TRENDING_COMMENT_WEIGHT,
+        })
+        self.like(first)
+        self.assertEqual(self.scores()[first.pk], 0)
+        response = self.client.get(TRENDING)
+        self.assertEqual(list(response.context['page_obj']), [second, first])
+
+    def test_trending_pagination(self):
+        """Популярное листается и страницами, и курсором по счёту"""
+        for post in self.posts:
+            self.comment(post)
+        for post in self.posts[:3]:
+            self.like(post)
+        expected = self.posts[2::-1] + self.posts[:2:-1]
+        pages = self.client.get(TRENDING + '?page=2').context['page_obj']
+        self.assertEqual(list(pages), expected[PAGINATOR_LIMIT:])
+        page = self.client.get(TRENDING + '?cursor=').context['page_obj']
+        self.assertEqual(list(page), expected[:PAGINATOR_LIMIT])
+        page = self.client.get(
+            f'{TRENDING}?cursor={page.next_cursor}'
+        ).context['page_obj']
+        self.assertEqual(list(page), expected[PAGINATOR_LIMIT:])
+
+    def test_removed_like_keeps_score_non_negative(self):
+        """Снятый после затухания лайк не уводит счёт ниже нуля"""
+        first = self.posts[0]
+        self.like(first)
+        trending.decay(TRENDING_HALF_LIFE)
+        self.like(first)
+        self.assertEqual(self.scores()[first.pk], 0)
+
+    def test_invalid_score_cursor(self):
+        """Курсор с нечисловым счётом открывает первую страницу"""
+        for post in self.posts:
+            self.comment(post)
+        cursor = trending.TrendingPaginator(
+            trending.trending_posts(), PAGINATOR_LIMIT
+        ).encode_cursor('n', {'trending_score': 'x', 'id': self.posts[0].pk})
+        page = self.client.get(TRENDING, {'cursor': cursor}).context[
+            'page_obj'
+        ]
+        self.assertEqual(len(page), PAGINATOR_LIMIT)
+        self.assertFalse(page.has_previous())
+
+    def test_decay_and_rebuild(self):
+        """Счёт затухает вдвое за период полураспада, остывшие удаляются"""
+        first, second = self.posts[:2]
+        self.comment(first)
+        self.like(second)
+        etag = self.client.get(TRENDING)['ETag']
+        trending.decay(TRENDING_HALF_LIFE * 4)
+        self.assertEqual(
+            self.scores(), {first.pk: TRENDING_COMMENT_WEIGHT / 16}
+        )
+        self.assertNotEqual(self.client.get(TRENDING)['ETag'], etag)
+        call_command('update_trending', rebuild=True, stdout=StringIO())
+        scores = self.scores()
+        self.assertEqual(set(scores), {first.pk, second.pk})
+        self.assertAlmostEqual(
+            scores[first.pk], TRENDING_COMMENT_WEIGHT, places=3
+        )
+
+
+class RateLimitTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=USERNAME)
+        cls.user_2 = User.objects.create_user(username=USERNAME_2)
+        cls.post = Post.objects.create(author=cls.user, text='Тестовый пост')
+        cls.ADD_COMMENT = reverse(
+            'posts:add_comment', kwargs={'post_id': cls.post.pk}
+        )
+        cls.authorized_client = Client()
+        cls.authorized_client.force_login(cls.user)
+        cls.authorized_2 = Client()
+        cls.authorized_2.force_login(cls.user_2)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_comments_limited_per_user(self):
+        """Сверх ведра комментарии получают 429, другой автор - нет"""
+        requests, _, _ = RATE_LIMITS['posts:add_comment']
+        for _ in range(requests):
+            self.authorized_client.post(self.ADD_COMMENT, {'text': 'Спам'})
+        response = self.authorized_client.post(
+            self.ADD_COMMENT, {'text': 'Спам'}
+        )
+        self.assertEqual(response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+        self.assertGreater(int(response['Retry-After']), 0)
+        self.assertEqual(Comment.objects.count(), requests)
+        self.assertEqual(
+            self.authorized_2.post(
+                self.ADD_COMMENT, {'text': 'Не спам'}
+            ).status_code,
+            HTTPStatus.FOUND,
+        )
+
+    def test_like_limit_answers_json(self):
+        """Превышение лимита лайков в AJAX - JSON с кодом 429"""
+        requests, _, _ = RATE_LIMITS['posts:like']
+        like = reverse('posts:like', kwargs={'post_id': self.post.pk})
+        for _ in range(requests):
+            self.authorized_client.post(like)
+        response = self.authorized_client.post(
+            like, HTTP_X_REQUESTED_WITH='XMLHttpRequest'
+        )
+        self.assertEqual(response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+        self.assertIn('detail', response.json())
+
+    def test_signup_limited_per_ip(self):
+        """Гости ограничены по IP, формы по GET открываются всегда"""
+        requests, _, _ = RATE_LIMITS['users:signup']
+        signup = reverse('users:signup')
+        for number in range(requests):
+            self.client.post(signup, {'username': f'spammer{number}'})
+        self.assertEqual(
+            self.client.post(signup, {}).status_code,
+            HTTPStatus.TOO_MANY_REQUESTS,
+        )
+        self.assertEqual(self.client.get(signup).status_code, HTTPStatus.OK)
+        self.assertEqual(
+            self.client.post(signup, {}, REMOTE_ADDR='10.0.0.1').status_code,
+            HTTPStatus.OK,
+        )
+
+    @override_settings(CLIENT_IP_HEADER='HTTP_X_FORWARDED_FOR')
+    def test_guests_behind_proxy_have_own_buckets(self):
+        """За прокси ведро гостя - по адресу из заголовка прокси"""
+        requests, _, _ = RATE_LIMITS['users:signup']
+        signup = reverse('users:signup')
+        proxy = {'REMOTE_ADDR': '127.0.0.1'}
+        for number in range(requests):
+            self.client.post(
+                signup, {}, HTTP_X_FORWARDED_FOR='10.0.0.1', **proxy
+            )
+        self.assertEqual(self.client.post(
+            signup, {}, HTTP_X_FORWARDED_FOR='10.0.0.1', **proxy
+        ).status_code, HTTPStatus.TOO_MANY_REQUESTS)
+        self.assertEqual(self.client.post(
+            signup, {}, HTTP_X_FORWARDED_FOR='10.0.0.1, 10.0.0.2', **proxy
+        ).status_code, HTTPStatus.OK)
+
+    def test_bucket_refills(self):
+        """Токены возвращаются по одному за period / requests секунд"""
+        with mock.patch.object(ratelimit.time, 'time', return_value=1000):
+            self.assertEqual(ratelimit.take('bucket', 2, 10), 0)
+            self.assertEqual(ratelimit.take('bucket', 2, 10), 0)
+            self.assertEqual(ratelimit.take('bucket', 2, 10), 5)
+        with mock.patch.object(ratelimit.time, 'time', return_value=1005):
+            self.assertEqual(ratelimit.take('bucket', 2, 10), 0)
+            self.assertEqual(ratelimit.take('bucket', 2, 10), 5)
+
+
+class ConcurrentViewsTest(TransactionTestCase):
+    """Вне транзакции независимые запросы идут в пуле потоков."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username=USERNAME)
+        self.reader = User.objects.create_user(username=USERNAME_2)
+        self.post = Post.objects.create(author=self.user, text='Тестовый пост')
+        Comment.objects.create(
+            author=self.reader, text='Тестовый комент', post=self.post
+        )
+        Follow.objects.create(user=self.reader, author=self.user)
+        self.client.force_login(self.reader)
+        cache.clear()
+
+    def test_gather_uses_worker_threads(self):
+        """gather возвращает результаты по порядку из других потоков"""
+        names = concurrent.gather(
+            lambda: threading.current_thread().name,
+            lambda: threading.current_thread().name,
+            lambda: Post.objects.count(),
+        )
+        self.assertEqual(names[0], threading.current_thread().name)
+        self.assertTrue(names[1].startswith('view-queries'))
+        self.assertEqual(names[2], 1)
+
+    def test_gather_is_sequential_in_transaction(self):
+        """Внутри транзакции gather не уходит в другие потоки"""
+        with transaction.atomic():
+            names = concurrent.gather(
+                lambda: threading.current_thread().name,
+                lambda: threading.current_thread().name,
+            )
+        self.assertEqual(names, [threading.current_thread().name] * 2)
+
+    def test_gather_keeps_execute_wrappers(self):
+        """Запросы задач проходят через обёртки соединения запроса"""
+        threads = []
+
+        def wrapper(execute, sql, params, many, context):
+            threads.append(threading.current_thread().name)
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(wrapper):
+            concurrent.gather(lambda: None, lambda: Post.objects.count())
+        self.assertEqual(len(threads), 1)
+        self.assertTrue(threads[0].startswith('view-queries'))
+
+    def test_views_with_concurrent_queries(self):
+        """profile и post_detail собирают контекст из пула потоков"""
+        profile = self.client.get(PROFILE).context
+        self.assertTrue(profile['following'])
+        self.assertEqual(profile['author_stats']['posts_count'], 1)
+        self.assertEqual(list(profile['page_obj']), [self.post])
+        detail = self.client.get(reverse(
+            'posts:post_detail', kwargs={'post_id': self.post.pk}
+        )).context
+        self.assertEqual(detail['author_stats']['following_count'], 1)
+        self.assertEqual(len(detail['comments_page']), 1)
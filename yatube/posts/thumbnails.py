@@ -0,0 +1,102 @@
+"""Миниатюры картинок постов, подготовленные заранее.
+
+Картинка нарезается в фоновом пуле потоков сразу после загрузки.
+Шаблонный тег {% thumbnail %} через ReadyThumbnailBackend только читает
+готовые миниатюры: пока миниатюры нет, он отдаёт оригинал. После нарезки
+пост помечается изменённым, чтобы закешированные карточки и ленты
+показали миниатюру. Старые картинки нарезает команда generate_thumbnails.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import close_old_connections
+from django.utils import timezone
+from sorl.thumbnail import default
+from sorl.thumbnail.base import ThumbnailBackend
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings
+from sorl.thumbnail.images import ImageFile
+
+from . import feed_cache
+from .models import Post
+from .settings import POST_THUMBNAILS, THUMBNAIL_WORKERS
+
+logger = logging.getLogger(__name__)
+
+executor = None
+pending = set()
+pending_lock = threading.Lock()
+
+
+class ReadyThumbnailBackend(ThumbnailBackend):
+
+    def get_ready_thumbnail(self, file_, geometry_string, **options):
+        """Готовая миниатюра из хранилища ключей или None."""
+        source = ImageFile(file_)
+        if settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault('format', self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(settings, attr)
+            if value != getattr(default_settings, attr):
+                options.setdefault(key, value)
+        return default.kvstore.get(ImageFile(
+            self._get_thumbnail_filename(source, geometry_string, options),
+            default.storage,
+        ))
+
+    def get_thumbnail(self, file_, geometry_string, **options):
+        if not file_:
+            raise ValueError('falsey file_ argument in get_thumbnail()')
+        thumbnail = self.get_ready_thumbnail(
+            file_, geometry_string, **options
+        )
+        return thumbnail or ImageFile(file_)
+
+    def create_thumbnail(self, file_, geometry_string, **options):
+        return super().get_thumbnail(file_, geometry_string, **options)
+
+
+backend = ReadyThumbnailBackend()
+
+
+def generate_thumbnails(name):
+    """Нарезает все миниатюры, которые используют шаблоны постов."""
+    for geometry, options in POST_THUMBNAILS:
+        backend.create_thumbnail(name, geometry, **options)
+
+
+def run(name, post_id):
+    try:
+        generate_thumbnails(name)
+        if post_id:
+            Post.objects.filter(pk=post_id).update(modified=timezone.now())
+            post = Post.objects.filter(pk=post_id).first()
+            if post:
+                feed_cache.bump_post(post)
+    except Exception:
+        logger.exception('Не удалось нарезать миниатюры для %s', name)
+    finally:
+        with pending_lock:
+            pending.discard(name)
+        close_old_connections()
+
+
+def schedule(name, post_id=None):
+    """Ставит картинку в очередь нарезки, если её там ещё нет."""
+    global executor
+    with pending_lock:
+        if name in pending:
+            return
+        pending.add(name)
+        if THUMBNAIL_WORKERS and executor is None:
+            executor = ThreadPoolExecutor(
+                max_workers=THUMBNAIL_WORKERS,
+                thread_name_prefix='thumbnails',
+            )
+    if not THUMBNAIL_WORKERS:
+        run(name, post_id)
+        return
+    executor.submit(run, name, post_id)
@@ -0,0 +1,177 @@
+"""Лента подписок, разложенная по читателям при публикации поста.
+
+У авторов с числом подписчиков больше TIMELINE_FANOUT_LIMIT посты
+не раскладываются: решение принимается при записи и сохраняется
+в Post.fanned_out, а читатели получают такие посты запросом при чтении.
+"""
+from django.db import transaction
+from django.db.models import Count, Q
+
+from .models import Follow, Post, TimelineEntry
+from .settings import TIMELINE_BATCH_SIZE, TIMELINE_FANOUT_LIMIT
+
+
+def is_large_author(author):
+    return Follow.objects.filter(
+        author=author
+    ).count() > TIMELINE_FANOUT_LIMIT
+
+
+def add_entries(rows):
+    batch = []
+    for user_id, post_id, pub_date in rows:
+        batch.append(TimelineEntry(
+            user_id=user_id, post_id=post_id, pub_date=pub_date
+        ))
+        if len(batch) == TIMELINE_BATCH_SIZE:
+            TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def fan_out(post):
+    """Раскладывает новый пост по лентам подписчиков автора."""
+    if is_large_author(post.author_id):
+        post.fanned_out = False
+        Post.objects.filter(pk=post.pk).update(fanned_out=False)
+        return
+    add_entries(
+        (user_id, post.pk, post.pub_date) for user_id in Follow.objects.filter(
+            author=post.author_id
+        ).values_list('user_id', flat=True).iterator()
+    )
+
+
+def backfill(user, author):
+    """Добавляет в ленту читателя разложенные посты нового автора."""
+    add_entries(
+        (user.pk, post_id, pub_date)
+        for post_id, pub_date in Post.objects.filter(
+            author=author, fanned_out=True
+        ).values_list('pk', 'pub_date').iterator()
+    )
+
+
+def rebuild():
+    """Раскладка заново по текущим подпискам, например после импорта."""
+    large_authors = Follow.objects.values('author').annotate(
+        followers=Count('pk')
+    ).filter(followers__gt=TIMELINE_FANOUT_LIMIT).values('author')
+    with transaction.atomic():
+        TimelineEntry.objects.all().delete()
+        Post.objects.filter(author__in=large_authors).update(fanned_out=False)
+        Post.objects.exclude(author__in=large_authors).update(fanned_out=True)
+        add_entries(Post.objects.filter(
+            fanned_out=True, author__following__isnull=False
+        ).values_list(
+            'author__following__user', 'pk', 'pub_date'
+        ).iterator())
+
+
+def prune(user, author):
+    TimelineEntry.objects.filter(user=user, post__author=author).delete()
+
+
+def pulled_posts(user):
+    return Post.objects.filter(
+        fanned_out=False,
+        author__in=Follow.objects.filter(user=user).values('author'),
+    )
+
+
+def timeline_posts(user):
+    """Посты ленты подписок: свои записи и неразложенные посты."""
+    return Post.objects.filter(
+        Q(pk__in=TimelineEntry.objects.filter(user=user).values('post'))
+        | Q(fanned_out=False, author__in=Follow.objects.filter(
+            user=user
+        ).values('author'))
+    )
+
+
+def rename(condition, old, new):
+    """Копия условия, где поле old заменено на new."""
+    renamed = Q()
+    renamed.connector, renamed.negated = condition.connector, condition.negated
+    for child in condition.children:
+        if isinstance(child, Q):
+            child = rename(child, old, new)
+        else:
+            lookup, value = child
+            field, _, suffix = lookup.partition('__')
+            if field == old:
+                lookup = new + (suffix and '__' + suffix)
+            child = lookup, value
+        renamed.children.append(child)
+    return renamed
+
+
+class Timeline:
+    """Лента подписок для пагинаторов: две половины в одном запросе.
+
+    Разложенные посты листаются по индексу (user, -pub_date, -post)
+    записей без JOIN с постами, неразложенные - по частичному индексу
+    постов. Ключ (pub_date, id) у половин общий, они не пересекаются,
+    поэтому страница - UNION ALL с сортировкой и срезом; сами посты
+    выбираются одним запросом по id страницы.
+    """
+
+    model = Post
+    ordered = True
+
+    def __init__(self, user, ordering=('-pub_date', '-id'), conditions=()):
+        self.user = user
+        self.ordering = tuple(ordering)
+        self.conditions = tuple(conditions)
+
+    def clone(self, **kwargs):
+        return Timeline(**{
+            'user': self.user,
+            'ordering': self.ordering,
+            'conditions': self.conditions,
+            **kwargs,
+        })
+
+    def order_by(self, *ordering):
+        return self.clone(ordering=ordering)
+
+    def reverse(self):
+        return self.clone(ordering=[
+            field[1:] if field.startswith('-') else '-' + field
+            for field in self.ordering
+        ])
+
+    def filter(self, condition):
+        return self.clone(conditions=self.conditions + (condition,))
+
+    def pulled(self):
+        queryset = pulled_posts(self.user)
+        for condition in self.conditions:
+            queryset = queryset.filter(condition)
+        return queryset
+
+    def pushed(self):
+        queryset = TimelineEntry.objects.filter(user=self.user)
+        for condition in self.conditions:
+            queryset = queryset.filter(rename(condition, 'id', 'post'))
+        return queryset
+
+    def count(self):
+        return self.pulled().count() + self.pushed().count()
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            return self[key:key + 1][0]
+        ids = [
+            post_id for _, post_id in self.pulled().order_by().values_list(
+                'pub_date', 'id'
+            ).union(
+                self.pushed().order_by().values_list('pub_date', 'post'),
+                all=True,
+            ).order_by(*self.ordering)[key]
+        ]
+        posts = Post.objects.for_feed().in_bulk(ids)
+        return [posts[post_id] for post_id in ids if post_id in posts]
@@ -0,0 +1,316 @@
+"""Перенос данных posts между окружениями в формате JSONL.
+
+Одна строка - одна запись: {"kind": ..., поля}. Записи идут по видам в
+порядке KINDS, чтобы при загрузке все ссылки уже существовали.
+Пользователи и группы ссылаются по username и slug, посты и комментарии
+сохраняют свои первичные ключи. Картинки не копируются: в записи поста
+лежит имя файла в хранилище медиа.
+
+И выгрузка, и загрузка идут пачками по ключу, поэтому память не зависит
+от объёма данных, а смещение последней готовой пачки служит
+контрольной точкой для продолжения после сбоя.
+
+bulk_create не отправляет сигналы, поэтому лента подписок, версии лент
+и счётчики авторов обновляются один раз в конце загрузки: пачки только
+собирают затронутые ленты и авторов. Записи, ключ которых уже есть в
+базе, не загружаются, а попадают в отчёт. Комментарии и лайки
+пропущенного поста тоже пропускаются: пост с тем же ключом в базе -
+чужой, и без поста они прицепились бы к нему.
+"""
+import abc
+import contextlib
+import json
+
+from django.contrib.auth.hashers import make_password
+
+from . import feed_cache
+from .models import Comment, Follow, Group, Post, User
+from .paginator import CursorEncoder
+
+FORMAT = 'yatube'
+VERSION = 1
+Like = Post.likes.through
+
+
+def encode(record):
+    return (
+        json.dumps(record, cls=CursorEncoder, ensure_ascii=False) + '\n'
+    ).encode()
+
+
+def decode(line):
+    return json.loads(line)
+
+
+def lookup(model, field, values):
+    """Первичные ключи по натуральному ключу для одной пачки."""
+    return dict(
+        model.objects.filter(
+            **{f'{field}__in': set(values)}
+        ).values_list(field, 'pk')
+    )
+
+
+def posts_feeds(post_ids):
+    """Ленты постов пачки: на карточках видны лайки и комментарии."""
+    return [
+        feed for post in Post.objects.filter(
+            pk__in=set(post_ids)
+        ).only('author', 'group')
+        for feed in feed_cache.post_feeds(post)
+    ]
+
+
+@contextlib.contextmanager
+def keep_dates(model):
+    """Отключает auto_now: при загрузке даты берутся из выгрузки."""
+    fields = [
+        field for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False)
+        or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, saved):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Kind(abc.ABC):
+    """Вид записей: какие поля выгружать и как собрать объекты пачки."""
+    name = None
+    model = None
+    fields = ()
+    # Уникальный ключ: запись с таким ключом в базе - конфликт.
+    key_fields = ('pk',)
+    # Ссылки на записи других видов по ключу: поле -> вид.
+    references = {}
+
+    def queryset(self):
+        return self.model.objects.order_by('pk').values('pk', *self.fields)
+
+    def to_record(self, row):
+        return {'kind': self.name, **row}
+
+    @abc.abstractmethod
+    def build(self, records):
+        """Несохранённые объекты модели для пачки записей."""
+
+    def key(self, obj):
+        return tuple(getattr(obj, field) for field in self.key_fields)
+
+    def existing(self, objects):
+        """Ключи объектов пачки, которые уже есть в базе."""
+        keys = {self.key(obj) for obj in objects}
+        first = self.key_fields[0]
+        return keys & set(self.model.objects.filter(
+            **{f'{first}__in': {key[0] for key in keys}}
+        ).values_list(*self.key_fields))
+
+    def orphans(self, objects, skipped):
+        """Ключи объектов пачки, ссылающихся на пропущенные записи."""
+        return {
+            self.key(obj) for obj in objects
+            if any(
+                (getattr(obj, field),) in skipped.get(kind, ())
+                for field, kind in self.references.items()
+            )
+        }
+
+    def load(self, records, skipped):
+        """Загружает пачку.
+
+        skipped - ключи уже пропущенных записей по видам. Возвращает
+        загруженные объекты, конфликты и пропущенные вслед за ними.
+        """
+        objects = self.build(records)
+        conflicts = self.existing(objects)
+        orphans = self.orphans(objects, skipped) - conflicts
+        dropped = conflicts | orphans
+        objects = [obj for obj in objects if self.key(obj) not in dropped]
+        with keep_dates(self.model):
+            self.model.objects.bulk_create(objects)
+        return objects, conflicts, orphans
+
+    def feeds(self, objects):
+        """Ленты, версии которых при обычном save() сдвигают сигналы."""
+        return ()
+
+    def authors(self, objects):
+        """Пользователи, чьи счётчики в кеше устарели."""
+        return ()
+
+
+class UserKind(Kind):
+    """Пароли не переносятся: пользователи получают непригодный пароль."""
+    name = 'user'
+    model = User
+    fields = ('username', 'first_name', 'last_name', 'email', 'date_joined')
+    key_fields = ('username',)
+
+    def build(self, records):
+        return [
+            User(
+                password=make_password(None),
+                **{field: record[field] for field in self.fields},
+            )
+            for record in records
+        ]
+
+
+class GroupKind(Kind):
+    name = 'group'
+    model = Group
+    fields = ('title', 'slug', 'description')
+    key_fields = ('slug',)
+
+    def build(self, records):
+        return [
+            Group(**{field: record[field] for field in self.fields})
+            for record in records
+        ]
+
+
+class PostKind(Kind):
+    name = 'post'
+    model = Post
+    fields = (
+        'text', 'pub_date', 'modified', 'author__username', 'group__slug',
+        'image', 'likes_count', 'comments_count',
+    )
+
+    def build(self, records):
+        authors = lookup(
+            User, 'username', (r['author__username'] for r in records)
+        )
+        groups = lookup(
+            Group, 'slug', (r['group__slug'] for r in records
+                            if r['group__slug'])
+        )
+        return [
+            Post(
+                pk=record['pk'],
+                text=record['text'],
+                pub_date=record['pub_date'],
+                modified=record['modified'],
+                author_id=authors[record['author__username']],
+                group_id=groups.get(record['group__slug']),
+                image=record['image'],
+                likes_count=record['likes_count'],
+                comments_count=record['comments_count'],
+            )
+            for record in records
+        ]
+
+    def feeds(self, posts):
+        return [feed for post in posts for feed in feed_cache.post_feeds(post)]
+
+    def authors(self, posts):
+        return [post.author_id for post in posts]
+
+
+class CommentKind(Kind):
+    name = 'comment'
+    model = Comment
+    fields = ('text', 'created', 'author__username', 'post_id')
+    references = {'post_id': 'post'}
+
+    def build(self, records):
+        authors = lookup(
+            User, 'username', (r['author__username'] for r in records)
+        )
+        return [
+            Comment(
+                pk=record['pk'],
+                text=record['text'],
+                created=record['created'],
+                author_id=authors[record['author__username']],
+                post_id=record['post_id'],
+            )
+            for record in records
+        ]
+
+    def feeds(self, comments):
+        return posts_feeds(
+            comment.post_id for comment in comments
+        ) + [feed_cache.author_feed(comment.author_id) for comment in comments]
+
+    def authors(self, comments):
+        return [comment.author_id for comment in comments]
+
+
+class FollowKind(Kind):
+    name = 'follow'
+    model = Follow
+    fields = ('user__username', 'author__username')
+    key_fields = ('user_id', 'author_id')
+
+    def build(self, records):
+        users = lookup(User, 'username', (
+            username for record in records for username in (
+                record['user__username'], record['author__username']
+            )
+        ))
+        return [
+            Follow(
+                user_id=users[record['user__username']],
+                author_id=users[record['author__username']],
+            )
+            for record in records
+        ]
+
+    def feeds(self, follows):
+        return [
+            feed_cache.author_feed(user_id) for follow in follows
+            for user_id in (follow.user_id, follow.author_id)
+        ]
+
+    def authors(self, follows):
+        return [
+            user_id for follow in follows
+            for user_id in (follow.user_id, follow.author_id)
+        ]
+
+
+class LikeKind(Kind):
+    name = 'like'
+    model = Like
+    fields = ('post_id', 'user__username')
+    key_fields = ('post_id', 'user_id')
+    references = {'post_id': 'post'}
+
+    def build(self, records):
+        users = lookup(
+            User, 'username', (r['user__username'] for r in records)
+        )
+        return [
+            Like(
+                post_id=record['post_id'],
+                user_id=users[record['user__username']],
+            )
+            for record in records
+        ]
+
+    def feeds(self, likes):
+        return posts_feeds(like.post_id for like in likes)
+
+
+KINDS = {
+    kind.name: kind for kind in (
+        UserKind(), GroupKind(), PostKind(), CommentKind(), FollowKind(),
+        LikeKind(),
+    )
+}
+
+
+# Виды, на пропущенные записи которых ссылаются другие.
+REFERENCED = {
+    name for kind in KINDS.values() for name in kind.references.values()
+}
+
+
+def header():
+    return {'format': FORMAT, 'version': VERSION}
@@ -0,0 +1,126 @@
+"""Популярные посты: счёт по лайкам и комментариям с затуханием.
+
+Пересчитывать все посты на каждый запрос дорого, поэтому счёт хранится
+в таблице Trending и меняется событиями: лайк или комментарий добавляет
+свой вес одним UPDATE. Раз в TRENDING_DECAY_INTERVAL команда
+update_trending умножает все счета на одинаковый множитель (период
+полураспада TRENDING_HALF_LIFE) и оставляет не больше TRENDING_SIZE
+постов, так что таблица и страница популярного остаются маленькими.
+"""
+import collections
+import datetime
+
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from . import feed_cache
+from .models import Comment, Post, Trending
+from .paginator import CursorPaginator, finite_float
+from .settings import (TRENDING_COMMENT_WEIGHT, TRENDING_DECAY_INTERVAL,
+                       TRENDING_HALF_LIFE, TRENDING_LIKE_WEIGHT,
+                       TRENDING_MIN_SCORE, TRENDING_SIZE)
+
+
+def decay_factor(seconds):
+    return 0.5 ** (seconds / TRENDING_HALF_LIFE)
+
+
+def add(post_id, weight):
+    """Прибавляет вес события к счёту поста.
+
+    Отрицательный вес (снятый лайк, удалённый комментарий) вычитается из
+    уже состаренного счёта, поэтому счёт не опускается ниже нуля.
+    """
+    with transaction.atomic():
+        if weight > 0:
+            Trending.objects.bulk_create(
+                [Trending(post_id=post_id)], ignore_conflicts=True
+            )
+        Trending.objects.filter(post=post_id).update(
+            score=Greatest(F('score') + weight, 0.0)
+        )
+
+
+def add_like(post_id, count=1):
+    add(post_id, count * TRENDING_LIKE_WEIGHT)
+
+
+def add_comment(post_id, count=1):
+    add(post_id, count * TRENDING_COMMENT_WEIGHT)
+
+
+def trim():
+    """Удаляет остывшие посты и всё, что ниже TRENDING_SIZE мест."""
+    Trending.objects.filter(score__lt=TRENDING_MIN_SCORE).delete()
+    threshold = Trending.objects.order_by('-score').values_list(
+        'score', flat=True
+    )[TRENDING_SIZE:TRENDING_SIZE + 1].first()
+    if threshold is not None:
+        Trending.objects.filter(score__lte=threshold).delete()
+
+
+def decay(seconds=TRENDING_DECAY_INTERVAL):
+    """Состаривает все счета на seconds секунд."""
+    with transaction.atomic():
+        Trending.objects.update(score=F('score') * decay_factor(seconds))
+        trim()
+    feed_cache.bump(feed_cache.TRENDING_FEED)
+
+
+def rebuild(now=None):
+    """Пересчёт с нуля, например после импорта: bulk_create без сигналов.
+
+    У лайка нет даты, поэтому он стареет вместе с постом, а комментарий -
+    со своей датой.
+    """
+    now = now or timezone.now()
+    # За восемь периодов полураспада вес падает в 256 раз.
+    since = now - datetime.timedelta(seconds=TRENDING_HALF_LIFE * 8)
+
+    def age(moment):
+        return (now - moment).total_seconds()
+
+    scores = collections.Counter()
+    for post_id, pub_date, likes_count in Post.objects.filter(
+        pub_date__gte=since, likes_count__gt=0
+    ).values_list('pk', 'pub_date', 'likes_count').iterator():
+        scores[post_id] += (
+            likes_count * TRENDING_LIKE_WEIGHT * decay_factor(age(pub_date))
+        )
+    for post_id, created in Comment.objects.filter(
+        created__gte=since
+    ).values_list('post', 'created').iterator():
+        scores[post_id] += TRENDING_COMMENT_WEIGHT * decay_factor(age(created))
+    with transaction.atomic():
+        Trending.objects.all().delete()
+        Trending.objects.bulk_create(
+            Trending(post_id=post_id, score=score)
+            for post_id, score in scores.most_common(TRENDING_SIZE)
+        )
+        trim()
+    feed_cache.bump(feed_cache.TRENDING_FEED)
+
+
+def trending_posts():
+    """Посты популярного в порядке счёта, счёт - в поле trending_score."""
+    return Post.objects.for_feed().filter(
+        trending__isnull=False
+    ).annotate(
+        trending_score=F('trending__score')
+    ).order_by('-trending_score', '-id')
+
+
+class TrendingPaginator(CursorPaginator):
+    """Курсор по (trending_score, id): счёт - аннотация, а не поле модели."""
+
+    def __init__(self, object_list, per_page):
+        super().__init__(
+            object_list, per_page, ordering=('-trending_score', '-id')
+        )
+
+    def to_python(self, field, value):
+        if field == 'trending_score':
+            return finite_float(value)
+        return super().to_python(field, value)
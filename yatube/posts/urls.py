@@ -1,6 +1,6 @@
 from django.urls import path
 
-from . import views
+from . import api, feeds, views
 
 app_name = 'posts'
 
@@ -8,6 +8,9 @@ urlpatterns = [
     path('',
          views.index,
          name='index'),
+    path('trending/',
+         views.trending_index,
+         name='trending'),
     path('group/<slug:slug>/',
          views.group_posts,
          name='group_list'),
@@ -20,9 +23,15 @@ urlpatterns = [
     path('posts/<int:post_id>/',
          views.post_detail,
          name='post_detail'),
+    path('search/',
+         views.post_search,
+         name='search'),
     path('create/',
          views.post_create,
          name='post_create'),
+    path('posts/<int:post_id>/comments/',
+         views.post_comments,
+         name='post_comments'),
     path('posts/<int:post_id>/comment/',
          views.add_comment,
          name='add_comment'),
@@ -38,4 +47,40 @@ urlpatterns = [
     path('posts/<int:post_id>/like/',
          views.add_like,
          name='like'),
+    path('rss/',
+         feeds.posts_rss,
+         name='posts_rss'),
+    path('atom/',
+         feeds.posts_atom,
+         name='posts_atom'),
+    path('group/<slug:slug>/rss/',
+         feeds.group_rss,
+         name='group_rss'),
+    path('group/<slug:slug>/atom/',
+         feeds.group_atom,
+         name='group_atom'),
+    path('profile/<str:username>/rss/',
+         feeds.author_rss,
+         name='profile_rss'),
+    path('profile/<str:username>/atom/',
+         feeds.author_atom,
+         name='profile_atom'),
+    path('api/v1/posts/',
+         api.posts,
+         name='api_posts'),
+    path('api/v1/posts/<int:post_id>/',
+         api.post,
+         name='api_post'),
+    path('api/v1/posts/<int:post_id>/comments/',
+         api.post_comments,
+         name='api_post_comments'),
+    path('api/v1/groups/',
+         api.groups,
+         name='api_groups'),
+    path('api/v1/groups/<slug:slug>/',
+         api.group,
+         name='api_group'),
+    path('api/v1/follow/',
+         api.follow,
+         name='api_follow'),
 ]
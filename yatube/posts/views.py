@@ -1,58 +1,157 @@
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.http import JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
-from django.views.decorators.cache import cache_page
+from django.utils.http import is_safe_url
+from django.views.decorators.http import require_POST
 
+from . import concurrent, feed_cache, search, thumbnails, trending
+from .conditional import (conditional_page, group_state, index_state,
+                          post_state, profile_state, trending_state)
 from .forms import CommentForm, PostForm
 from .models import Follow, Group, Post, User
-from .settings import CACHE_IN_S, PAGINATOR_LIMIT
+from .paginator import CursorPaginator
+from .settings import (COMMENTS_LIMIT, CURSOR_PAGINATION,
+                       FEED_CACHE_TIMEOUT, PAGINATOR_LIMIT,
+                       POST_CARD_CACHE_TIMEOUT)
+from .stats import get_author_stats
+from .suggestions import get_suggestions
+from .timeline import Timeline
 
 
-def get_page(request, list):
+def get_page(request, list, cursor_paginator=CursorPaginator):
+    cursor = request.GET.get('cursor')
+    if CURSOR_PAGINATION or cursor is not None:
+        return cursor_paginator(list, PAGINATOR_LIMIT).get_page(cursor)
     return Paginator(list, PAGINATOR_LIMIT).get_page(
         request.GET.get('page')
     )
 
 
-@cache_page(CACHE_IN_S, key_prefix='index_page')
+def get_feed(request, list, feed=None, cursor_paginator=CursorPaginator):
+    """Страница ленты и версия её кешируемого тела."""
+    page = get_page(request, list, cursor_paginator)
+    # Посты выбираются здесь, а не при рендеринге: в profile лента
+    # запрашивается параллельно остальным запросам страницы.
+    page.object_list = [*page.object_list]
+    return {
+        'page_obj': page,
+        'feed': feed,
+        'feed_version': feed and feed_cache.get_version(feed),
+        'feed_cache_timeout': FEED_CACHE_TIMEOUT,
+        'card_cache_timeout': POST_CARD_CACHE_TIMEOUT,
+    }
+
+
+@conditional_page(index_state)
 def index(request):
-    return render(request, 'posts/index.html', {
-        'page_obj': get_page(
-            request,
-            Post.objects.all()
-        ),
-    })
+    return render(request, 'posts/index.html', get_feed(
+        request,
+        Post.objects.for_feed(),
+        feed_cache.GLOBAL_FEED,
+    ))
+
 
+@conditional_page(trending_state)
+def trending_index(request):
+    return render(request, 'posts/trending.html', get_feed(
+        request,
+        trending.trending_posts(),
+        feed_cache.TRENDING_FEED,
+        trending.TrendingPaginator,
+    ))
 
+
+@conditional_page(group_state)
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
     return render(request, 'posts/group_list.html', {
         'group': group,
-        'page_obj': get_page(request, group.posts.all()),
+        **get_feed(
+            request,
+            group.posts.for_feed(),
+            feed_cache.group_feed(group.pk),
+        ),
     })
 
 
+@conditional_page(profile_state)
 def profile(request, username):
     author = get_object_or_404(User, username=username)
+    user = request.user
+    feed, author_stats, following, suggestions = concurrent.gather(
+        lambda: get_feed(
+            request,
+            author.posts.for_feed(),
+            feed_cache.author_feed(author.pk),
+        ),
+        lambda: get_author_stats(author.pk),
+        lambda: (
+            user != author
+            and user.is_authenticated
+            and Follow.objects.filter(user=user, author=author).exists()
+        ),
+        lambda: user.is_authenticated and get_suggestions(user),
+    )
     return render(request, 'posts/profile.html', {
         'author': author,
-        'page_obj': get_page(request, author.posts.all()),
-        'following':
-            (request.user != author)
-            and request.user.is_authenticated
-            and Follow.objects.filter(
-                user=request.user, author=author).exists()
+        'author_stats': author_stats,
+        **feed,
+        'following': following,
+        'suggestions': suggestions,
+    })
+
+
+def post_search(request):
+    query = request.GET.get('q', '')
+    return render(request, 'posts/search.html', {
+        'query': query,
+        'page_obj': search.get_search_page(
+            query, PAGINATOR_LIMIT, request.GET.get('cursor')
+        ),
     })
 
 
+def get_comments_page(request, post):
+    return CursorPaginator(
+        post.comments.select_related('author'),
+        COMMENTS_LIMIT,
+        ordering=('-created', '-id'),
+    ).get_page(request.GET.get('cursor'))
+
+
+@conditional_page(post_state)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
+    post = get_object_or_404(Post.objects.for_feed(), id=post_id)
+    comments_page, author_stats = concurrent.gather(
+        lambda: get_comments_page(request, post),
+        lambda: get_author_stats(post.author_id),
+    )
     return render(request, 'posts/post_detail.html', {
         'post': post,
+        'author_stats': author_stats,
+        'comments_page': comments_page,
         'form': CommentForm()
     })
 
 
+def post_comments(request, post_id):
+    post = get_object_or_404(Post.objects.only('id'), id=post_id)
+    return render(request, 'posts/includes/comment_list.html', {
+        'post': post,
+        'comments_page': get_comments_page(request, post),
+    })
+
+
+def schedule_thumbnails(post):
+    if post.image:
+        transaction.on_commit(
+            lambda: thumbnails.schedule(post.image.name, post.pk)
+        )
+
+
 @login_required
 def post_create(request):
     form = PostForm(
@@ -66,6 +165,7 @@ def post_create(request):
     post = form.save(commit=False)
     post.author = request.user
     post.save()
+    schedule_thumbnails(post)
     return redirect('posts:profile', username=request.user)
 
 
@@ -74,6 +174,7 @@ def post_edit(request, post_id):
     post = get_object_or_404(Post, id=post_id)
     if request.user != post.author:
         return redirect('posts:post_detail', post_id=post_id)
+    group_id = post.group_id
     form = PostForm(
         request.POST or None,
         files=request.FILES or None,
@@ -81,6 +182,10 @@ def post_edit(request, post_id):
     )
     if form.is_valid():
         form.save()
+        if 'image' in form.changed_data:
+            schedule_thumbnails(post)
+        if group_id and group_id != post.group_id:
+            feed_cache.bump(feed_cache.group_feed(group_id))
         return redirect('posts:post_detail', post_id=post_id)
     return render(request, 'posts/create_post.html', {
         'post': post,
@@ -96,16 +201,20 @@ def add_comment(request, post_id):
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
-        comment.save()
+        # Сигналы сдвигают счётчик в той же транзакции, что и комментарий.
+        with transaction.atomic():
+            comment.save()
+        # Сигнал уже сдвинул версии, но до фиксации счётчика: страница,
+        # собранная в этот промежуток, не должна остаться актуальной.
+        feed_cache.bump_post(post)
     return redirect('posts:post_detail', post_id=post_id)
 
 
 @login_required
 def follow_index(request):
     return render(request, 'posts/follow.html', {
-        'page_obj':
-            get_page(request, Post.objects.filter(
-                author__following__user=request.user)),
+        **get_feed(request, Timeline(request.user)),
+        'suggestions': get_suggestions(request.user),
     })
 
 
@@ -128,15 +237,45 @@ def profile_unfollow(request, username):
 
 
 @login_required
+@require_POST
 def add_like(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
-    is_like = False
-    for like in post.likes.all():
-        if like == request.user:
-            is_like = True
-            break
-    if not is_like:
-        post.likes.add(request.user)
-    if is_like:
-        post.likes.remove(request.user)
-    return redirect(request.POST.get('text'))
+    """Ставит или снимает лайк.
+
+    Запросы: DELETE лайка, при его отсутствии INSERT в точке сохранения
+    (одновременные клики разрешает уникальный ключ), затем UPDATE
+    счётчика поста, если он изменился, и SELECT его нового значения.
+    """
+    post = get_object_or_404(
+        Post.objects.only('author', 'group'), id=post_id
+    )
+    likes = Post.likes.through.objects
+    with transaction.atomic():
+        removed, _ = likes.filter(post=post, user=request.user).delete()
+        if removed:
+            change = -removed
+        else:
+            try:
+                with transaction.atomic():
+                    likes.create(post=post, user=request.user)
+                change = 1
+            except IntegrityError:
+                change = 0
+        if change:
+            Post.objects.filter(pk=post.pk).update(
+                likes_count=F('likes_count') + change
+            )
+            # Через промежуточную модель сигналы post_save не отправляются.
+            trending.add_like(post.pk, change)
+        likes_count = Post.objects.values_list(
+            'likes_count', flat=True
+        ).get(pk=post.pk)
+    feed_cache.bump_post(post)
+    if request.is_ajax():
+        return JsonResponse({
+            'liked': not removed,
+            'likes_count': likes_count,
+        })
+    next_url = request.POST.get('text')
+    if not is_safe_url(next_url, allowed_hosts={request.get_host()}):
+        return redirect('posts:post_detail', post_id=post_id)
+    return redirect(next_url)
@@ -0,0 +1,22 @@
+// Следующие комментарии дописываются в список без перезагрузки страницы.
+document.addEventListener('click', function (event) {
+  var link = event.target.closest('.more-comments');
+  if (!link) {
+    return;
+  }
+  event.preventDefault();
+  fetch(link.dataset.fragment, {credentials: 'same-origin'})
+    .then(function (response) {
+      if (!response.ok) {
+        throw new Error(response.status);
+      }
+      return response.text();
+    })
+    .then(function (html) {
+      link.insertAdjacentHTML('afterend', html);
+      link.remove();
+    })
+    .catch(function () {
+      window.location = link.href;
+    });
+});
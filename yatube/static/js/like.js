@@ -0,0 +1,25 @@
+// Лайк без перезагрузки страницы; без JS форма работает как раньше.
+document.addEventListener('submit', function (event) {
+  var form = event.target.closest('.like-form');
+  if (!form) {
+    return;
+  }
+  event.preventDefault();
+  fetch(form.action, {
+    method: 'POST',
+    body: new FormData(form),
+    headers: {'X-Requested-With': 'XMLHttpRequest'},
+    credentials: 'same-origin'
+  }).then(function (response) {
+    if (!response.ok) {
+      throw new Error(response.status);
+    }
+    return response.json();
+  }).then(function (data) {
+    var counter = form.closest('ul').querySelector('.like-count');
+    counter.textContent = data.likes_count;
+    counter.hidden = data.likes_count === 0;
+  }).catch(function () {
+    form.submit();
+  });
+});
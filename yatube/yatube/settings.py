@@ -51,11 +51,13 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'posts.ratelimit.RateLimitMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -68,6 +70,9 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
+        # Загрузчики по умолчанию: при DEBUG=False Django сам оборачивает
+        # их в cached.Loader, шаблоны компилируются один раз на процесс;
+        # прогрев - в wsgi.py.
         'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
@@ -135,6 +140,10 @@ STATIC_URL = '/static/'
 
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 
+STATIC_ROOT = os.path.join(BASE_DIR, 'collected_static')
+
+STATICFILES_STORAGE = 'core.storage.CompressedManifestStaticFilesStorage'
+
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
 
@@ -146,8 +155,35 @@ CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+THUMBNAIL_BACKEND = 'posts.thumbnails.ReadyThumbnailBackend'
+
+# Заголовок META с адресом клиента от своего обратного прокси, например
+# HTTP_X_FORWARDED_FOR; пустой - клиенты ходят напрямую (REMOTE_ADDR).
+CLIENT_IP_HEADER = os.environ.get('YATUBE_CLIENT_IP_HEADER', '')
+
+# /metrics/ и замеры запросов включаются явно: YATUBE_METRICS_ENABLED=1.
+METRICS_ENABLED = os.environ.get(
+    'YATUBE_METRICS_ENABLED', ''
+).lower() in ('1', 'true', 'yes')
+# Адреса клиентов (core.ip.client_ip), которым отдаётся /metrics/.
+METRICS_ALLOWED_IPS = os.environ.get(
+    'YATUBE_METRICS_ALLOWED_IPS', '127.0.0.1,::1'
+).split(',')
+
+# Общий для всех воркеров кеш: сброс версий лент виден каждому процессу.
+# Значения в нём сериализованы pickle, поэтому файл лежит в каталоге
+# проекта, а не в общем для всех /tmp. Тесты получают свой файл.
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': 'core.cache.SQLiteCache',
+        'LOCATION': os.environ.get(
+            'YATUBE_CACHE_LOCATION',
+            os.path.join(BASE_DIR, 'cache', 'yatube.sqlite3'),
+        ),
+        'OPTIONS': {
+            'MAX_SIZE': 256 * 1024 * 1024,
+        },
     }
 }
+
+TEST_RUNNER = 'core.testing.TestRunner'
@@ -1,14 +1,23 @@
 from django.conf import settings
 from django.conf.urls.static import static
 from django.contrib import admin
-from django.urls import include, path
+from django.urls import include, path, re_path
+
+from core import static as core_static
+from core import views as core_views
 
 urlpatterns = [
+    re_path(
+        r'^{}(?P<path>.+)$'.format(settings.STATIC_URL.lstrip('/')),
+        core_static.serve,
+        name='static',
+    ),
     path('admin/', admin.site.urls),
     path('auth/', include('users.urls')),
     path('auth/', include('django.contrib.auth.urls')),
     path('', include('posts.urls', namespace='posts')),
     path('about/', include('about.urls', namespace='about')),
+    path('metrics/', core_views.metrics, name='metrics'),
 ]
 
 handler403 = 'core.views.csrf_failure'
@@ -14,3 +14,9 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
 
 application = get_wsgi_application()
+
+# Импорт после настройки Django: модулю нужны загруженные settings.
+from core.templates import warm_templates  # noqa: E402
+
+# Шаблоны компилируются при старте воркера, а не на первых запросах.
+warm_templates()